@@ -1,3 +1,4 @@
 from agents.target_agent import TargetAgent
 from agents.ego_agent import CasADiEgoAgent
-from agents.dynamic_mode import DynamicMode
\ No newline at end of file
+from agents.dynamic_mode import DynamicMode
+from agents.target_replay import TargetRecorder, ReplayTargetAgent
\ No newline at end of file
@@ -1,89 +1,93 @@
-import random
-import math
-import pygame
+import inspect
+import numpy as np
 
 class DynamicMode:
-    def __init__(self, color, update_func):
+    def __init__(self, color, kernel):
         self.color = color
-        self.update_func = update_func
-        
-    def update(self, target, dt):
-        return self.update_func(target, dt)
+        self.kernel = kernel
+        self.uses_rng = 'rng' in inspect.signature(kernel).parameters
 
-def spiral_motion(target, dt):
-    time_val = pygame.time.get_ticks() / 1000
+    def update(self, target, dt, time_val=0.0, rng=None):
+        dx, dy, vx, vy = self.update_batch(
+            np.array([target.x], dtype=float),
+            np.array([target.y], dtype=float),
+            np.array([target.vx], dtype=float),
+            np.array([target.vy], dtype=float),
+            dt, time_val, rng
+        )
+        target.vx = float(vx[0])
+        target.vy = float(vy[0])
+        return float(dx[0]), float(dy[0])
+
+    def update_batch(self, x, y, vx, vy, dt, time_val=0.0, rng=None):
+        if rng is not None and self.uses_rng:
+            return self.kernel(x, y, vx, vy, dt, time_val, rng=rng)
+        return self.kernel(x, y, vx, vy, dt, time_val)
+
+def spiral_motion(x, y, vx, vy, dt, time_val):
     radius = 50 + time_val % 10 * 5
     angular_velocity = 3.0
-    target.vx = radius * angular_velocity * math.cos(angular_velocity * time_val)
-    target.vy = radius * angular_velocity * math.sin(angular_velocity * time_val)
-    return target.vx * dt, target.vy * dt
+    vx = np.full_like(x, radius * angular_velocity * np.cos(angular_velocity * time_val))
+    vy = np.full_like(y, radius * angular_velocity * np.sin(angular_velocity * time_val))
+    return vx * dt, vy * dt, vx, vy
 
-def bounce_motion(target, dt):
+def bounce_motion(x, y, vx, vy, dt, time_val):
     speed = 120
-    return target.vx * dt, target.vy * dt
+    return vx * dt, vy * dt, vx, vy
 
-def pursuit_motion(target, dt, ego_pos=None):
+def pursuit_motion(x, y, vx, vy, dt, time_val, ego_pos=None, rng=np.random):
     if ego_pos is None:
-        return random_walk(target, dt)
-        
+        return random_walk(x, y, vx, vy, dt, time_val, rng)
+
     pursuit_speed = 60
-    dx = ego_pos[0] - target.x
-    dy = ego_pos[1] - target.y
-    dist = math.sqrt(dx**2 + dy**2)
-    
-    if dist > 0:
-        dx = dx / dist * pursuit_speed
-        dy = dy / dist * pursuit_speed
-    
-    return dx * dt, dy * dt
-
-def evasion_motion(target, dt, ego_pos=None):
+    dx = ego_pos[0] - x
+    dy = ego_pos[1] - y
+    dist = np.sqrt(dx**2 + dy**2)
+
+    scale = np.divide(pursuit_speed, dist, out=np.ones_like(dist), where=dist > 0)
+    return dx * scale * dt, dy * scale * dt, vx, vy
+
+def evasion_motion(x, y, vx, vy, dt, time_val, ego_pos=None, rng=np.random):
     if ego_pos is None:
-        return random_walk(target, dt)
-        
+        return random_walk(x, y, vx, vy, dt, time_val, rng)
+
     evasion_speed = 90
-    dx = target.x - ego_pos[0]
-    dy = target.y - ego_pos[1]
-    dist = math.sqrt(dx**2 + dy**2)
-    
-    if dist > 0:
-        dx = dx / dist * evasion_speed
-        dy = dy / dist * evasion_speed
-    
-    return dx * dt, dy * dt
-
-def oscillating_motion(target, dt):
-    time_val = pygame.time.get_ticks() / 1000
-    amplitude = 30 + 20 * math.sin(time_val / 5)
+    dx = x - ego_pos[0]
+    dy = y - ego_pos[1]
+    dist = np.sqrt(dx**2 + dy**2)
+
+    scale = np.divide(evasion_speed, dist, out=np.ones_like(dist), where=dist > 0)
+    return dx * scale * dt, dy * scale * dt, vx, vy
+
+def oscillating_motion(x, y, vx, vy, dt, time_val):
+    amplitude = 30 + 20 * np.sin(time_val / 5)
     speed = 70
-    target.vx = amplitude * math.sin(time_val * 2)
-    return speed * dt, target.vx * dt
+    vx = np.full_like(x, amplitude * np.sin(time_val * 2))
+    return np.full_like(x, speed * dt), vx * dt, vx, vy
 
-def linear_motion(target, dt):
+def linear_motion(x, y, vx, vy, dt, time_val):
     speed = 100
-    return speed * dt, 0
+    return np.full_like(x, speed * dt), np.zeros_like(y), vx, vy
 
-def sine_wave_motion(target, dt):
+def sine_wave_motion(x, y, vx, vy, dt, time_val):
     speed = 80
-    target.vy = 50 * math.sin(pygame.time.get_ticks() / 500)
-    return speed * dt, target.vy * dt
+    vy = np.full_like(y, 50 * np.sin(time_val * 2))
+    return np.full_like(x, speed * dt), vy * dt, vx, vy
 
-def circular_motion(target, dt):
+def circular_motion(x, y, vx, vy, dt, time_val):
     speed = 100
-    time_val = pygame.time.get_ticks() / 1000
-    target.vx = speed * math.cos(time_val)
-    target.vy = speed * math.sin(time_val)
-    return target.vx * dt, target.vy * dt
-
-def random_walk(target, dt):
-    if random.random() < 0.05:
-        target.vx = random.uniform(-100, 100)
-        target.vy = random.uniform(-100, 100)
-    return target.vx * dt, target.vy * dt
-
-def zigzag_motion(target, dt):
+    vx = np.full_like(x, speed * np.cos(time_val))
+    vy = np.full_like(y, speed * np.sin(time_val))
+    return vx * dt, vy * dt, vx, vy
+
+def random_walk(x, y, vx, vy, dt, time_val, rng=np.random):
+    n = len(x)
+    switch = rng.random(n) < 0.05
+    vx = np.where(switch, rng.uniform(-100, 100, n), vx)
+    vy = np.where(switch, rng.uniform(-100, 100, n), vy)
+    return vx * dt, vy * dt, vx, vy
+
+def zigzag_motion(x, y, vx, vy, dt, time_val):
     speed = 120
-    if int(pygame.time.get_ticks() / 1000) % 2 == 0:
-        return speed * dt, speed * 0.5 * dt
-    else:
-        return -speed * dt, -speed * 0.5 * dt
\ No newline at end of file
+    direction = 1 if int(time_val) % 2 == 0 else -1
+    return np.full_like(x, direction * speed * dt), np.full_like(y, direction * speed * 0.5 * dt), vx, vy
@@ -1,11 +1,16 @@
 import math
 import pygame
-from planning.valiant_estimator import ValiantEstimator
+from contextlib import nullcontext
+from planning.valiant_estimator import ValiantEstimator, WindowedValiantEstimator, DecayedValiantEstimator
+from planning.transition_estimator import ModeTransitionEstimator
 from planning.mpc import CasADiMPC
+from planning.async_planner import AsyncPlanner
+from obstacles import as_obstacle_index
+from utils.simulation_clock import SimulationClock
 from constants import RED, YELLOW, BLUE
 
 class CasADiEgoAgent:
-    def __init__(self, start_pos, goal_pos, target, obstacles, radius=15, target_bound=0.90):
+    def __init__(self, start_pos, goal_pos, target, obstacles, radius=15, target_bound=0.90, solver_mode='ipopt', async_planning=False, obstacle_model='analytic', estimator_mode='full', estimator_window=100, scenario_model='marginal', incremental_scenarios=False, target_model='mean', solve_time_budget=0.25, rng=None):
         self.x, self.y = start_pos
         self.start_pos = start_pos
         self.goal_pos = goal_pos
@@ -13,12 +18,23 @@ class CasADiEgoAgent:
         self.speed = 80
         self.vx, self.vy = 0, 0
         self.target = target
-        self.obstacles = obstacles
+        self.obstacles = as_obstacle_index(obstacles)
         self.observation_interval = 0.2
         self.observation_timer = 0
-        self.estimator = ValiantEstimator(target_bound)
+        self.clock = SimulationClock()
+        self.time = 0.0
+        self.target_bound = target_bound
+        self.estimator_mode = estimator_mode
+        self.estimator_window = estimator_window
+        self.estimator = self.create_estimator()
+        self.scenario_model = scenario_model
+        self.transition_estimator = ModeTransitionEstimator(len(target.modes), self.observation_interval)
         
-        self.mpc = CasADiMPC(target, self.estimator, obstacles)
+        self.mpc = CasADiMPC(
+            target, self.estimator, self.obstacles, solver_mode=solver_mode,
+            obstacle_model=obstacle_model, incremental_scenarios=incremental_scenarios, target_model=target_model,
+            solve_time_budget=solve_time_budget, rng=rng
+        )
         
         self.planned_trajectory = []
         self.position_history = []
@@ -28,7 +44,7 @@ class CasADiEgoAgent:
         self.collision_with_obstacle = False
         self.planning_timer = 0
         self.planning_interval = 0.5
-        self.target_bound = target_bound
+        self.async_planner = AsyncPlanner(self.mpc, self.planning_interval) if async_planning else None
         self.sufficient_samples = False
         self.using_conservative_trajectory = True
         self.min_samples_required = 20 
@@ -43,9 +59,35 @@ class CasADiEgoAgent:
         self.collision_with_obstacle = False
         self.sufficient_samples = False
         self.using_conservative_trajectory = True
-        self.estimator = ValiantEstimator(self.target_bound)
+        self.estimator = self.create_estimator()
+        self.transition_estimator = ModeTransitionEstimator(len(self.target.modes), self.observation_interval)
+        with self.async_planner.paused() if self.async_planner is not None else nullcontext():
+            self.mpc.estimator = self.estimator
+            self.mpc.reset()
+            if self.async_planner is not None:
+                self.async_planner.invalidate()
+        
+    def close(self):
+        if self.async_planner is not None:
+            self.async_planner.close()
+    
+    def __del__(self):
+        if getattr(self, 'async_planner', None) is not None:
+            self.async_planner.close()
+        
+    def create_estimator(self):
+        if self.estimator_mode == 'window':
+            return WindowedValiantEstimator(self.target_bound, window=self.estimator_window)
+        if self.estimator_mode == 'decay':
+            return DecayedValiantEstimator(self.target_bound, decay=1.0 - 1.0 / self.estimator_window)
+        return ValiantEstimator(self.target_bound)
+        
+    def update(self, dt, clock=None):
+        if clock is None:
+            clock = self.clock
+            clock.advance(dt)
+        self.time = clock.time
         
-    def update(self, dt):
         self.position_history.append((self.x, self.y))
         if len(self.position_history) > self.max_history:
             self.position_history.pop(0)
@@ -61,41 +103,39 @@ class CasADiEgoAgent:
             self.collision = True
             
 
-        for obstacle in self.obstacles:
-            if obstacle.check_collision(self.x, self.y, self.radius):
-                self.collision_with_obstacle = True
-                break
+        if self.obstacles.collides_point(self.x, self.y, self.radius):
+            self.collision_with_obstacle = True
             
         self.observation_timer += dt
         if self.observation_timer >= self.observation_interval:
             self.observation_timer = 0
             
             self.estimator.add_observation(self.target.current_mode_idx)
+            self.transition_estimator.add_observation(self.target.current_mode_idx)
             
 
             current_bound = self.estimator.support_estimate_bound()
             self.sufficient_samples = (current_bound >= self.target_bound)
                 
+        if self.async_planner is not None:
+            new_plan = self.async_planner.poll()
+            if new_plan is not None:
+                self.planned_trajectory = new_plan
+                
         self.planning_timer += dt
-        if self.planning_timer >= self.planning_interval or not self.planned_trajectory or len(self.planned_trajectory) <= 1:
-            self.planning_timer = 0
+        replan_due = self.planning_timer >= self.planning_interval or not self.planned_trajectory or len(self.planned_trajectory) <= 1
+        if replan_due and self.async_planner is not None and self.planning_timer < self.planning_interval:
+            replan_due = not self.async_planner.busy()
             
-            current_state = [self.x, self.y, self.vx, self.vy]
-            
-
-            current_bound = self.estimator.support_estimate_bound()
-            self.sufficient_samples = (current_bound >= self.target_bound)
+        if replan_due:
+            self.planning_timer = 0
             
-            if self.sufficient_samples:
-                mode_probs = self.estimator.get_mode_probabilities()
-                ucb_probs = self.estimator.calculate_ucb(mode_probs)
-                
-                self.estimator.estimated_modes['probabilities'] = ucb_probs
-                self.planned_trajectory = self.mpc.plan_trajectory(current_state, self.goal_pos)
-                self.using_conservative_trajectory = False 
+            snapshot = self.planning_snapshot()
+            if self.async_planner is not None:
+                self.async_planner.submit(snapshot)
             else:
-                self.planned_trajectory = self.mpc.plan_conservative_trajectory(current_state, self.goal_pos)
-                self.using_conservative_trajectory = True  
+                self.planned_trajectory = self.mpc.plan(snapshot)
+            self.using_conservative_trajectory = snapshot['conservative']
             
         if self.planned_trajectory and len(self.planned_trajectory) > 1:
             next_pos = self.planned_trajectory[1]
@@ -113,13 +153,7 @@ class CasADiEgoAgent:
                 new_y = self.y + dy * move_dist
                 
 
-                collision = False
-                for obstacle in self.obstacles:
-                    if obstacle.check_collision(new_x, new_y, self.radius):
-                        collision = True
-                        break
-                
-                if not collision:
+                if not self.obstacles.collides_point(new_x, new_y, self.radius):
                     self.x = new_x
                     self.y = new_y
                     self.vx = dx * self.speed
@@ -130,6 +164,32 @@ class CasADiEgoAgent:
                 
             self.planned_trajectory.pop(0)
     
+    def planning_snapshot(self):
+        current_bound = self.estimator.support_estimate_bound()
+        self.sufficient_samples = (current_bound >= self.target_bound)
+        
+        snapshot = {
+            'current_state': [self.x, self.y, self.vx, self.vy],
+            'goal_pos': self.goal_pos,
+            'target_state': (self.target.x, self.target.y, self.target.vx, self.target.vy),
+            'confidence': current_bound,
+            'conservative': not self.sufficient_samples,
+            'time': self.time,
+            'mode_probs': None,
+            'mode_sampler': None
+        }
+        
+        if self.sufficient_samples:
+            mode_probs = self.estimator.get_mode_probabilities()
+            ucb_probs = self.estimator.calculate_ucb(mode_probs)
+            
+            self.estimator.estimated_modes['probabilities'] = ucb_probs
+            snapshot['mode_probs'] = dict(ucb_probs)
+            if self.scenario_model == 'markov':
+                snapshot['mode_sampler'] = self.transition_estimator.sampler(self.mpc.dt, ucb_probs)
+            
+        return snapshot
+    
     def draw(self, surface):
         for i, pos in enumerate(self.position_history[::3]):
             if i > 0 and i*3 < len(self.position_history)-3:
@@ -1,9 +1,11 @@
 import pygame
-import random
+import numpy as np
 from constants import GREEN, WIDTH, HEIGHT
+from obstacles import as_obstacle_index
+from utils.simulation_clock import SimulationClock
 
 class TargetAgent:
-    def __init__(self, x, y, radius=15):
+    def __init__(self, x, y, radius=15, rng=None):
         self.origin_x = x
         self.origin_y = y
         self.x = x
@@ -19,6 +21,11 @@ class TargetAgent:
         self.position_history = []
         self.max_history = 100
         self.stopped = False
+        self.clock = SimulationClock()
+        self.time = 0.0
+        self.rng = rng if rng is not None else np.random
+        self.obstacles = None
+        self.obstacle_index = None
 
     def reset(self):
         self.x = self.origin_x
@@ -33,7 +40,12 @@ class TargetAgent:
     def add_mode(self, mode):
         self.modes.append(mode)
         
-    def update(self, dt, obstacles, should_stop=False):
+    def update(self, dt, obstacles, should_stop=False, clock=None):
+        if clock is None:
+            clock = self.clock
+            clock.advance(dt)
+        self.time = clock.time
+        
         if should_stop:
             self.stopped = True
             
@@ -46,22 +58,20 @@ class TargetAgent:
         self.switch_timer += dt
         if self.switch_timer >= self.switch_interval:
             self.switch_timer = 0
-            self.current_mode_idx = random.randint(0, len(self.modes) - 1)
+            self.current_mode_idx = int(self.rng.choice(len(self.modes)))
             self.mode_history.append(self.current_mode_idx)
         
         if self.modes:
-            dx, dy = self.modes[self.current_mode_idx].update(self, dt)
+            dx, dy = self.modes[self.current_mode_idx].update(self, dt, self.time, self.rng)
             
             new_x = self.x + dx
             new_y = self.y + dy
             
-            collision = False
-            for obstacle in obstacles:
-                if obstacle.check_collision(new_x, new_y, self.radius):
-                    collision = True
-                    break
-            
-            if not collision:
+            if obstacles is not self.obstacles:
+                # Callers pass the same list every frame; index it once rather than per update
+                self.obstacles = obstacles
+                self.obstacle_index = as_obstacle_index(obstacles)
+            if not self.obstacle_index.collides_point(new_x, new_y, self.radius):
                 self.x = new_x
                 self.y = new_y
             else:
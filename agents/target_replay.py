@@ -0,0 +1,90 @@
+import numpy as np
+from agents import dynamic_mode
+from agents.dynamic_mode import DynamicMode
+from agents.target_agent import TargetAgent
+
+
+class TargetRecorder:
+    def __init__(self, target):
+        self.target = target
+        self.start_time = target.time
+        self.times = []
+        self.states = []
+        self.modes = []
+        self.switches = []
+        self._num_switches = len(target.mode_history)
+
+    def record(self):
+        target = self.target
+        self.times.append(target.time - self.start_time)
+        self.states.append((target.x, target.y, target.vx, target.vy))
+        self.modes.append(target.current_mode_idx)
+        self.switches.append(len(target.mode_history) > self._num_switches)
+        self._num_switches = len(target.mode_history)
+
+    def save(self, path, seed=None):
+        target = self.target
+        np.savez_compressed(
+            path,
+            times=np.array(self.times),
+            states=np.array(self.states, dtype=float).reshape(-1, 4),
+            modes=np.array(self.modes, dtype=np.int16),
+            switches=np.array(self.switches, dtype=bool),
+            kernels=np.array([mode.kernel.__name__ for mode in target.modes]),
+            colors=np.array([mode.color for mode in target.modes], dtype=np.uint8).reshape(-1, 3),
+            origin=np.array([target.origin_x, target.origin_y], dtype=float),
+            radius=target.radius,
+            seed=-1 if seed is None else seed
+        )
+
+
+class ReplayTargetAgent(TargetAgent):
+    def __init__(self, path):
+        with np.load(path) as data:
+            recording = {name: data[name] for name in data.files}
+
+        origin_x, origin_y = recording['origin']
+        super().__init__(origin_x, origin_y, radius=int(recording['radius']))
+        # The planner forecasts with the recorded mode set, so its kernels are rebuilt by name
+        for name, color in zip(recording['kernels'], recording['colors']):
+            self.add_mode(DynamicMode(tuple(int(c) for c in color), getattr(dynamic_mode, str(name))))
+
+        self.times = recording['times']
+        self.states = recording['states']
+        self.mode_sequence = recording['modes']
+        self.switches = recording['switches']
+        self.seed = int(recording['seed'])
+        self.frame = -1
+        self.replay_start = None
+
+    def reset(self):
+        super().reset()
+        self.frame = -1
+        self.replay_start = None
+
+    def update(self, dt, obstacles, should_stop=False, clock=None):
+        if clock is None:
+            clock = self.clock
+            clock.advance(dt)
+        self.time = clock.time
+        if self.replay_start is None:
+            self.replay_start = self.time - dt
+
+        if should_stop:
+            self.stopped = True
+
+        if not self.stopped and len(self.times) > 0:
+            # Frames are matched on elapsed time, so replays line up even on a clock that has already run
+            elapsed = self.time - self.replay_start
+            frame = int(np.searchsorted(self.times, elapsed + dt / 2, side='right')) - 1
+            for skipped in range(self.frame + 1, frame + 1):
+                if self.switches[skipped]:
+                    self.mode_history.append(int(self.mode_sequence[skipped]))
+            if frame > self.frame:
+                self.frame = frame
+                self.x, self.y, self.vx, self.vy = (float(v) for v in self.states[frame])
+                self.current_mode_idx = int(self.mode_sequence[frame])
+
+        self.position_history.append((self.x, self.y))
+        if len(self.position_history) > self.max_history:
+            self.position_history.pop(0)
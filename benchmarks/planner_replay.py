@@ -0,0 +1,65 @@
+import argparse
+import os
+import tempfile
+import numpy as np
+from utils.sweep import OUTCOMES, process_pool, record_workload, simulate_run
+
+VARIANTS = {
+    'mean': {'target_model': 'mean'},
+    'occupancy': {'target_model': 'occupancy'},
+    'representatives': {'target_model': 'representatives'},
+    'markov': {'scenario_model': 'markov'},
+    'incremental': {'scenario_model': 'markov', 'incremental_scenarios': True}
+}
+
+def variant_options(name):
+    # Iteration-capped solves only, so variants differ by planner and not by machine load
+    return dict(VARIANTS[name], solve_time_budget=None)
+
+def run_variants(variants, workloads, threshold, max_time, workers):
+    jobs = [(name, seed, path) for name in variants for seed, path in workloads]
+    if workers == 1:
+        runs = [simulate_run(threshold, seed, max_time, replay=path, ego_options=variant_options(name))
+                for name, seed, path in jobs]
+    else:
+        # Each run owns its target replay and planner stream, so jobs share nothing
+        with process_pool(workers) as pool:
+            futures = [pool.submit(simulate_run, threshold, seed, max_time, replay=path, ego_options=variant_options(name))
+                       for name, seed, path in jobs]
+            runs = [future.result() for future in futures]
+    return {name: [run for (variant, _, _), run in zip(jobs, runs) if variant == name] for name in variants}
+
+def main():
+    parser = argparse.ArgumentParser(description="A/B planner variants on identical recorded target workloads")
+    parser.add_argument("--variants", nargs="+", choices=sorted(VARIANTS), default=['mean', 'occupancy'])
+    parser.add_argument("--workloads", type=int, default=8)
+    parser.add_argument("--max-time", type=float, default=30)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--workload-dir", default=None, help="keep recorded workloads here (default: temporary)")
+    args = parser.parse_args()
+
+    workload_dir = args.workload_dir or tempfile.mkdtemp(prefix="target_workloads_")
+    os.makedirs(workload_dir, exist_ok=True)
+    workloads = []
+    for seed in range(args.workloads):
+        path = os.path.join(workload_dir, f"target_{seed}.npz")
+        if not os.path.exists(path):
+            record_workload(seed, path, args.max_time)
+        workloads.append((seed, path))
+
+    workers = args.workers or os.cpu_count() or 1
+    results = run_variants(args.variants, workloads, args.threshold, args.max_time, workers)
+
+    print(f"{len(workloads)} recorded workloads in {workload_dir}")
+    print(f"{'Variant':<16} | {'Success':^7} | {'Collision':^9} | {'Timeout':^7} | {'Runtime':^8} | {'Solves':^6} | {'Plan ms':^7} | {'p95 ms':^7}")
+    print("-" * 86)
+    for name, runs in results.items():
+        rates = {outcome: np.mean([run['result'] == outcome for run in runs]) for outcome in OUTCOMES}
+        print(f"{name:<16} | {rates['success']:^7.2f} | {rates['collision']:^9.2f} | {rates['timeout']:^7.2f} | "
+              f"{np.mean([run['runtime'] for run in runs]):^8.2f} | {np.mean([run['solves'] for run in runs]):^6.0f} | "
+              f"{np.mean([run['latency_mean_ms'] for run in runs]):^7.1f} | "
+              f"{np.mean([run['latency_p95_ms'] for run in runs]):^7.1f}")
+
+if __name__ == "__main__":
+    main()
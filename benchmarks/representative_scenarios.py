@@ -0,0 +1,84 @@
+import argparse
+import random
+import numpy as np
+from constants import WIDTH, HEIGHT, GREEN
+from agents.target_agent import TargetAgent
+from planning.mpc import CasADiMPC
+from planning.scenario_rollout import ScenarioRollout
+from planning.valiant_estimator import ValiantEstimator
+from utils.scenario_generator import setup_motion_modes
+
+def create_target():
+    target = TargetAgent(WIDTH // 2, HEIGHT // 2)
+    setup_motion_modes(target, GREEN)
+    return target
+
+def planning_problems(num_problems, num_scenarios, seed=0):
+    random.seed(seed)
+    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
+    target = create_target()
+    rollout = ScenarioRollout(target.modes, [], horizon=10, dt=0.1)
+
+    problems = []
+    for _ in range(num_problems):
+        target_state = (rng.uniform(350, 450), rng.uniform(250, 350), rng.uniform(-50, 50), rng.uniform(-50, 50))
+        ego_state = [target_state[0] - rng.uniform(100, 160), target_state[1] + rng.uniform(-40, 40), 80, 0]
+        mode_probs = dict(enumerate(rng.dirichlet(np.full(len(target.modes), 0.3))))
+        scenarios = rollout.generate(target_state, mode_probs, num_scenarios, time_val=rng.uniform(0, 100))
+        problems.append((ego_state, target_state, mode_probs, scenarios))
+    return problems
+
+def evaluate(target_model, problems, num_representatives=4):
+    # No obstacles, so the target model is the only thing that differs between runs
+    mpc = CasADiMPC(create_target(), ValiantEstimator(0.9), [], forecast_cache_bytes=0,
+                    target_model=target_model, num_representatives=num_representatives)
+
+    # Every model plans against the same pre-generated scenarios
+    def fixed_scenarios(*args, **kwargs):
+        mpc.target_forecast = mpc.rollout.mean_forecast(mpc.scenarios)
+        mpc.num_scenarios_used = len(mpc.scenarios)
+        return mpc.scenarios
+    mpc.generate_target_scenarios = fixed_scenarios
+
+    solve_times = []
+    expected_costs = []
+    contacts = []
+    for ego_state, target_state, mode_probs, scenarios in problems:
+        mpc.reset()
+        mpc.scenarios = scenarios
+        traj = np.array(mpc.plan_trajectory(ego_state, (WIDTH - 50, HEIGHT // 2), target_state, mode_probs, 0.9))
+        solve_times.append(mpc.last_solve_time)
+
+        squared = np.sum((scenarios[:, :, :2] - traj[None, :mpc.horizon]) ** 2, axis=2)
+        expected_costs.append(np.mean(np.maximum(0, mpc.safety_distance**2 - squared).sum(axis=1)))
+        contacts.append(np.mean((squared[:, 1:] < mpc.target_clearance**2).any(axis=1)))
+
+    solve_ms = np.array(solve_times) * 1000
+    return {
+        'mean_ms': np.mean(solve_ms),
+        'p95_ms': np.percentile(solve_ms, 95),
+        'optimal': mpc.tier_counts['optimal'] / len(problems),
+        'expected_cost': np.mean(expected_costs),
+        'contact_rate': np.mean(contacts)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve time and safety of representative-scenario MPC for each K")
+    parser.add_argument("--problems", type=int, default=40)
+    parser.add_argument("--scenarios", type=int, default=200)
+    args = parser.parse_args()
+
+    problems = planning_problems(args.problems, args.scenarios)
+    configurations = [('mean', 'mean', 0), ('occupancy', 'occupancy', 0)]
+    configurations += [(f"K={k}", 'representatives', k) for k in (1, 2, 4, 8, 16)]
+
+    print(f"{'Model':<10} | {'Mean ms':^8} | {'p95 ms':^8} | {'Optimal':^7} | {'E[cost]':^8} | {'Contact':^7}")
+    print("-" * 62)
+    for label, target_model, k in configurations:
+        r = evaluate(target_model, problems, max(k, 1))
+        print(f"{label:<10} | {r['mean_ms']:^8.1f} | {r['p95_ms']:^8.1f} | {r['optimal']:^7.2f} | "
+              f"{r['expected_cost']:^8.0f} | {r['contact_rate']:^7.3f}")
+
+if __name__ == "__main__":
+    main()
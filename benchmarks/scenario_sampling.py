@@ -0,0 +1,57 @@
+import argparse
+import random
+import numpy as np
+from constants import WIDTH, HEIGHT, GREEN
+from obstacles import create_obstacles
+from agents.target_agent import TargetAgent
+from planning.scenario_rollout import ScenarioRollout
+from planning.scenario_sampling import STRATEGIES
+from utils.scenario_generator import setup_motion_modes
+
+def forecast_errors(strategies, scenario_counts, trials=20, repeats=20, reference_scenarios=4000, seed=0):
+    random.seed(seed)
+    np.random.seed(seed)
+
+    target = TargetAgent(WIDTH // 2, HEIGHT // 2)
+    setup_motion_modes(target, GREEN)
+    rollout = ScenarioRollout(target.modes, create_obstacles(), horizon=10, dt=0.1)
+
+    errors = {(s, n): [] for s in strategies for n in scenario_counts}
+    for _ in range(trials):
+        state = (np.random.uniform(100, WIDTH - 100), np.random.uniform(100, HEIGHT - 100),
+                 np.random.uniform(-50, 50), np.random.uniform(-50, 50))
+        weights = np.random.dirichlet(np.full(len(target.modes), 0.5))
+        mode_probs = {i: w for i, w in enumerate(weights)}
+        time_val = np.random.uniform(0, 100)
+
+        rollout.sampling = 'mc'
+        reference = rollout.mean_forecast(
+            rollout.generate(state, mode_probs, reference_scenarios, time_val=time_val)
+        )
+
+        for strategy in strategies:
+            rollout.sampling = strategy
+            for n in scenario_counts:
+                for _ in range(repeats):
+                    forecast = rollout.mean_forecast(rollout.generate(state, mode_probs, n, time_val=time_val))
+                    errors[(strategy, n)].append(np.mean(np.sum((forecast - reference)**2, axis=0)))
+
+    return {key: np.sqrt(np.mean(values)) for key, values in errors.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast error of scenario sampling strategies")
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    scenario_counts = [5, 10, 20, 40]
+    errors = forecast_errors(STRATEGIES, scenario_counts, args.trials, args.repeats)
+
+    print("RMSE of the mean forecast against a 4000-scenario reference (px)")
+    print(f"{'Strategy':<11} | " + " | ".join(f"{n:^7}" for n in scenario_counts))
+    print("-" * (14 + 10 * len(scenario_counts)))
+    for strategy in STRATEGIES:
+        print(f"{strategy:<11} | " + " | ".join(f"{errors[(strategy, n)]:^7.2f}" for n in scenario_counts))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import random
+import numpy as np
+from constants import WIDTH, HEIGHT, GREEN
+from obstacles import create_obstacles
+from agents.target_agent import TargetAgent
+from agents.ego_agent import CasADiEgoAgent
+from planning.mpc import CasADiMPC
+from utils.scenario_generator import create_random_motion_set
+
+def run_episode(solver_mode, seed, confidence_threshold=0.9, max_steps=2000, dt=0.016):
+    random.seed(seed)
+    np.random.seed(seed)
+    
+    obstacles = create_obstacles()
+    target = TargetAgent(WIDTH // 2, HEIGHT // 2)
+    create_random_motion_set(target, GREEN, num_modes=10)
+    ego = CasADiEgoAgent((100, 100), (WIDTH - 100, HEIGHT - 100), target, obstacles,
+                         target_bound=confidence_threshold, solver_mode=solver_mode)
+    reference = CasADiMPC(target, ego.estimator, obstacles, warm_start=False)
+    
+    latencies = []
+    deviations = []
+    mpc_solve = ego.mpc.solve
+    
+    def measured_solve(current_state):
+        try:
+            X_opt, U_opt = mpc_solve(current_state)
+        finally:
+            latencies.append(ego.mpc.last_solve_time)
+        
+        reference.parameter_values = ego.mpc.parameter_values
+        try:
+            X_ref, _ = reference.solve(current_state)
+            deviations.append(np.mean(np.linalg.norm(X_opt[:2] - X_ref[:2], axis=0)))
+        except RuntimeError:
+            pass
+        return X_opt, U_opt
+    
+    ego.mpc.solve = measured_solve
+    
+    result = "timeout"
+    steps = 0
+    for steps in range(1, max_steps + 1):
+        target.update(dt, obstacles, should_stop=ego.at_goal)
+        ego.update(dt)
+        if ego.at_goal:
+            result = "success"
+            break
+        if ego.collision or ego.collision_with_obstacle:
+            result = "collision"
+            break
+    
+    return result, steps * dt, latencies, deviations
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare IPOPT and real-time-iteration MPC modes")
+    parser.add_argument("--episodes", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args()
+    
+    print(f"{'Mode':<6} | {'Success':^7} | {'Collision':^9} | {'Timeout':^7} | {'Sim time':^8} | "
+          f"{'Mean ms':^8} | {'p95 ms':^8} | {'Max ms':^8} | {'Dev. px':^8}")
+    print("-" * 92)
+    for solver_mode in ("ipopt", "rti"):
+        outcomes = {"success": 0, "collision": 0, "timeout": 0}
+        sim_times = []
+        latencies = []
+        deviations = []
+        for seed in range(args.episodes):
+            result, sim_time, run_latencies, run_deviations = run_episode(solver_mode, seed, args.threshold)
+            outcomes[result] += 1
+            sim_times.append(sim_time)
+            latencies.extend(run_latencies)
+            deviations.extend(run_deviations)
+        
+        latencies_ms = np.array(latencies) * 1000
+        print(f"{solver_mode:<6} | {outcomes['success']:^7} | {outcomes['collision']:^9} | {outcomes['timeout']:^7} | "
+              f"{np.mean(sim_times):^8.2f} | {np.mean(latencies_ms):^8.2f} | {np.percentile(latencies_ms, 95):^8.2f} | "
+              f"{np.max(latencies_ms):^8.2f} | {np.mean(deviations):^8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import argparse
 import pygame
 import sys
 import traceback
@@ -16,9 +17,10 @@ from utils.visualization import (
     draw_legend, draw_estimation_stats, create_standard_legend, draw_text
 )
 from constants import GREEN, MAGENTA
+from utils.simulation_clock import SimulationClock
 from agents.dynamic_mode import pursuit_motion, evasion_motion
 
-def setup_simulation():
+def setup_simulation(**ego_options):
     obstacles = create_obstacles()
     
     target = TargetAgent(WIDTH // 2, HEIGHT // 2)
@@ -29,29 +31,38 @@ def setup_simulation():
     target.add_mode(DynamicMode(GREEN, zigzag_motion))
     target.add_mode(DynamicMode(GREEN, spiral_motion))
     target.add_mode(DynamicMode(GREEN, bounce_motion))
-    
-
-    pursuit_wrapper = lambda target, dt: pursuit_motion(target, dt)
-    evasion_wrapper = lambda target, dt: evasion_motion(target, dt)
-    
-    target.add_mode(DynamicMode(GREEN, pursuit_wrapper))
-    target.add_mode(DynamicMode(GREEN, evasion_wrapper))
+    target.add_mode(DynamicMode(GREEN, pursuit_motion))
+    target.add_mode(DynamicMode(GREEN, evasion_motion))
     target.add_mode(DynamicMode(GREEN, oscillating_motion))
     
     start_pos = (100, 100)
     goal_pos = (WIDTH - 100, HEIGHT - 100)
     
-    ego = CasADiEgoAgent(start_pos, goal_pos, target, obstacles)
+    ego = CasADiEgoAgent(start_pos, goal_pos, target, obstacles, **ego_options)
     
     return target, ego, obstacles
 
+def parse_args():
+    # Defaults match test.py and the sweep, so the demo shows the planner they measure
+    parser = argparse.ArgumentParser(description="Interactive target-avoidance demo")
+    parser.add_argument("--async-planning", action="store_true", help="plan on a background thread")
+    parser.add_argument("--scenario-model", choices=['marginal', 'markov'], default='marginal')
+    parser.add_argument("--incremental-scenarios", action="store_true", help="reuse consistent scenarios across replans")
+    parser.add_argument("--target-model", choices=['mean', 'occupancy', 'representatives'], default='mean')
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("CasADi MPC with Valiant Estimation and Reduced Obstacles")
     
-    target, ego, obstacles = setup_simulation()
+    target, ego, obstacles = setup_simulation(
+        async_planning=args.async_planning, scenario_model=args.scenario_model,
+        incremental_scenarios=args.incremental_scenarios, target_model=args.target_model
+    )
 
     clock = pygame.time.Clock()
+    sim_clock = SimulationClock()
     font = pygame.font.SysFont(None, 24)
     
 
@@ -59,78 +70,82 @@ def main():
     completed_runs = 0
     runtimes = []
     collision_counter = 0
-    while completed_runs < 100:
-        running = True
-        dt = 0.016
-        reset_timer = 0
-        reset_interval = 30
-
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
+    try:
+        while completed_runs < 100:
+            running = True
+            dt = 0.016
+            reset_timer = 0
+            reset_interval = 30
+
+            while running:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
                         running = False
-                    elif event.key == pygame.K_r:
-                        ego.reset()
-                        target.stopped = False
-                        reset_timer = 0
-                    elif event.key == pygame.K_SPACE:
-                        if dt > 0:
-                            dt = 0
-                        else:
-                            dt = 0.016
-
-            if ego.at_goal:
-                reached_goal_time = reset_timer
-                runtimes.append(reached_goal_time)
-                completed_runs+=1
-                running = False
-                ego.reset()
-                target.stopped = False
-                reset_timer = 0
-                target.reset()
-
-            reset_timer += dt
-            if reset_timer >= reset_interval or ego.collision or ego.collision_with_obstacle:
-                if ego.collision or ego.collision_with_obstacle:
-                    collision_counter += 1
-                    pygame.time.delay(1000)
-
-                if not ego.at_goal:
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_ESCAPE:
+                            running = False
+                        elif event.key == pygame.K_r:
+                            ego.reset()
+                            target.stopped = False
+                            reset_timer = 0
+                        elif event.key == pygame.K_SPACE:
+                            if dt > 0:
+                                dt = 0
+                            else:
+                                dt = 0.016
+
+                if ego.at_goal:
+                    reached_goal_time = reset_timer
+                    runtimes.append(reached_goal_time)
+                    completed_runs+=1
+                    running = False
                     ego.reset()
                     target.stopped = False
                     reset_timer = 0
+                    target.reset()
+
+                reset_timer += dt
+                if reset_timer >= reset_interval or ego.collision or ego.collision_with_obstacle:
+                    if ego.collision or ego.collision_with_obstacle:
+                        collision_counter += 1
+                        pygame.time.delay(1000)
+
+                    if not ego.at_goal:
+                        ego.reset()
+                        target.stopped = False
+                        reset_timer = 0
 
 
-            target.update(dt, obstacles, should_stop=ego.at_goal)
-            ego.update(dt)
+                sim_clock.advance(dt)
+                target.update(dt, obstacles, should_stop=ego.at_goal, clock=sim_clock)
+                ego.update(dt, sim_clock)
 
-            screen.fill(WHITE)
+                screen.fill(WHITE)
 
 
-            for obstacle in obstacles:
-                obstacle.draw(screen)
+                for obstacle in obstacles:
+                    obstacle.draw(screen)
 
-            ego.mpc.draw_scenarios(screen)
+                ego.mpc.draw_scenarios(screen)
 
-            target.draw(screen)
-            ego.draw(screen)
+                target.draw(screen)
+                ego.draw(screen)
 
 
-            draw_estimation_stats(screen, font, ego)
+                draw_estimation_stats(screen, font, ego)
 
 
-            legend_y = draw_legend(screen, font, legend_items, (WIDTH - 200, 10))
+                legend_y = draw_legend(screen, font, legend_items, (WIDTH - 200, 10))
 
 
-            draw_text(screen, font, "Magenta arrow: Average target trajectory forecast", (10 , 220), MAGENTA)
+                draw_text(screen, font, "Magenta arrow: Average target trajectory forecast", (10 , 220), MAGENTA)
 
-            pygame.display.flip()
+                pygame.display.flip()
 
-            if dt > 0:
-                clock.tick(60)
+                if dt > 0:
+                    clock.tick(60)
+    finally:
+        ego.close()
     print("Runtimes: " + str(runtimes))
     print("Total collisions: " + str(collision_counter))
     pygame.quit()
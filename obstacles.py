@@ -1,5 +1,8 @@
+import math
+import numpy as np
+import casadi as ca
 import pygame
-from constants import DARK_GRAY, GRAY
+from constants import DARK_GRAY, GRAY, WIDTH, HEIGHT
 
 class Obstacle:
     def __init__(self, x, y, width, height):
@@ -8,19 +11,210 @@ class Obstacle:
         self.width = width
         self.height = height
         self.rect = pygame.Rect(x, y, width, height)
+        self._inflated = {}
         
     def draw(self, surface):
         pygame.draw.rect(surface, DARK_GRAY, self.rect)
         pygame.draw.rect(surface, GRAY, self.rect, 2)
         
+    def inflated(self, radius):
+        rect = self._inflated.get(radius)
+        if rect is None:
+            rect = pygame.Rect(
+                self.x - radius, 
+                self.y - radius, 
+                self.width + 2 * radius, 
+                self.height + 2 * radius
+            )
+            self._inflated[radius] = rect
+        return rect
+        
     def check_collision(self, x, y, radius):
-        expanded_rect = pygame.Rect(
-            self.x - radius, 
-            self.y - radius, 
-            self.width + 2 * radius, 
-            self.height + 2 * radius
+        return self.inflated(radius).collidepoint(x, y)
+
+
+class _InflatedGrid:
+    def __init__(self, obstacles, radius, cell_size):
+        self.cell_size = cell_size
+        self.rects = [o.inflated(radius) for o in obstacles]
+        self.bounds = np.array(
+            [[r.left, r.top, r.right, r.bottom] for r in self.rects], dtype=float
+        ).reshape(-1, 4)
+        self.cells = {}
+        
+        if not self.rects:
+            self.origin = (0, 0)
+            self.shape = (0, 0)
+            self.table = np.full((0, 0, 0), -1, dtype=int)
+            return
+        
+        self.origin = (
+            math.floor(self.bounds[:, 0].min() / cell_size) * cell_size,
+            math.floor(self.bounds[:, 1].min() / cell_size) * cell_size
         )
-        return expanded_rect.collidepoint(x, y)
+        for i, rect in enumerate(self.rects):
+            cx0, cy0 = self.cell(rect.left, rect.top)
+            cx1, cy1 = self.cell(rect.right, rect.bottom)
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    self.cells.setdefault((cx, cy), []).append(i)
+                    
+        self.shape = (
+            max(cx for cx, _ in self.cells) + 1,
+            max(cy for _, cy in self.cells) + 1
+        )
+        depth = max(len(ids) for ids in self.cells.values())
+        self.table = np.full(self.shape + (depth,), -1, dtype=int)
+        for (cx, cy), ids in self.cells.items():
+            self.table[cx, cy, :len(ids)] = ids
+            
+        self.cell_bounds = {
+            key: [tuple(self.bounds[i]) for i in ids] for key, ids in self.cells.items()
+        }
+        
+    def cell(self, x, y):
+        return (
+            int((x - self.origin[0]) // self.cell_size),
+            int((y - self.origin[1]) // self.cell_size)
+        )
+        
+    def collides_point(self, x, y):
+        if not self.cells:
+            return False
+        for left, top, right, bottom in self.cell_bounds.get(self.cell(x, y), ()):
+            if left <= x < right and top <= y < bottom:
+                return True
+        return False
+        
+    def segment_candidates(self, start, end):
+        length = math.hypot(end[0] - start[0], end[1] - start[1])
+        steps = int(length // self.cell_size) + 1
+        candidates = set()
+        for k in range(steps + 1):
+            t = k / steps
+            cx, cy = self.cell(start[0] + t * (end[0] - start[0]), start[1] + t * (end[1] - start[1]))
+            for nx in (cx - 1, cx, cx + 1):
+                for ny in (cy - 1, cy, cy + 1):
+                    candidates.update(self.cells.get((nx, ny), ()))
+        return candidates
+        
+    def collides_segment(self, start, end):
+        if not self.cells:
+            return False
+        for i in self.segment_candidates(start, end):
+            if self.rects[i].clipline(start, end):
+                return True
+        return False
+        
+    def collides_points(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        hit = np.zeros(x.shape, dtype=bool)
+        if not self.cells:
+            return hit
+        
+        cx = np.floor((x - self.origin[0]) / self.cell_size).astype(int)
+        cy = np.floor((y - self.origin[1]) / self.cell_size).astype(int)
+        valid = (cx >= 0) & (cx < self.shape[0]) & (cy >= 0) & (cy < self.shape[1])
+        if not valid.any():
+            return hit
+        
+        candidates = self.table[cx[valid], cy[valid]]
+        b = self.bounds[candidates]
+        px = x[valid][:, None]
+        py = y[valid][:, None]
+        inside = (
+            (candidates >= 0) &
+            (px >= b[..., 0]) & (px < b[..., 2]) &
+            (py >= b[..., 1]) & (py < b[..., 3])
+        )
+        hit[valid] = inside.any(axis=1)
+        return hit
+
+
+class DistanceField:
+    def __init__(self, obstacles, width=WIDTH, height=HEIGHT, resolution=5):
+        self.resolution = resolution
+        self.xs = np.arange(0, width + resolution, resolution, dtype=float)
+        self.ys = np.arange(0, height + resolution, resolution, dtype=float)
+        gx, gy = np.meshgrid(self.xs, self.ys, indexing='ij')
+        
+        values = np.full(gx.shape, float(max(width, height)))
+        for o in obstacles:
+            qx = np.abs(gx - (o.x + o.width / 2)) - o.width / 2
+            qy = np.abs(gy - (o.y + o.height / 2)) - o.height / 2
+            outside = np.hypot(np.maximum(qx, 0), np.maximum(qy, 0))
+            inside = np.minimum(np.maximum(qx, qy), 0)
+            values = np.minimum(values, outside + inside)
+            
+        self.values = values
+        self._interpolant = None
+        
+    def interpolant(self):
+        if self._interpolant is None:
+            self._interpolant = ca.interpolant(
+                'obstacle_distance', 'linear', [self.xs, self.ys], self.values.ravel(order='F')
+            )
+        return self._interpolant
+
+
+class ObstacleIndex:
+    def __init__(self, obstacles, cell_size=64):
+        self.obstacles = list(obstacles)
+        self.cell_size = cell_size
+        self.centers = np.array(
+            [[o.x + o.width / 2, o.y + o.height / 2] for o in self.obstacles], dtype=float
+        ).reshape(-1, 2)
+        self._grids = {}
+        self._fields = {}
+        
+    def __iter__(self):
+        return iter(self.obstacles)
+    
+    def __len__(self):
+        return len(self.obstacles)
+    
+    def __getitem__(self, i):
+        return self.obstacles[i]
+    
+    def grid(self, radius):
+        grid = self._grids.get(radius)
+        if grid is None:
+            grid = _InflatedGrid(self.obstacles, radius, self.cell_size)
+            self._grids[radius] = grid
+        return grid
+    
+    def collides_point(self, x, y, radius):
+        return self.grid(radius).collides_point(x, y)
+    
+    def collides_segment(self, start, end, radius):
+        return self.grid(radius).collides_segment(start, end)
+    
+    def collides_points(self, x, y, radius):
+        return self.grid(radius).collides_points(x, y)
+    
+    def distance_field(self, resolution=5):
+        field = self._fields.get(resolution)
+        if field is None:
+            field = DistanceField(self.obstacles, resolution=resolution)
+            self._fields[resolution] = field
+        return field
+    
+    def nearest(self, x, y):
+        if not self.obstacles:
+            return None, float('inf')
+        dists = np.hypot(self.centers[:, 0] - x, self.centers[:, 1] - y)
+        i = int(np.argmin(dists))
+        return self.obstacles[i], float(dists[i])
+
+
+def as_obstacle_index(obstacles):
+    if isinstance(obstacles, ObstacleIndex):
+        return obstacles
+    return ObstacleIndex(obstacles)
+
+def obstacle_layout(obstacles):
+    return tuple((o.x, o.y, o.width, o.height) for o in obstacles)
 
 def create_obstacles():
     obstacles = []
@@ -29,4 +223,4 @@ def create_obstacles():
     obstacles.append(Obstacle(300, 350, 40, 200)) 
     obstacles.append(Obstacle(600, 300, 40, 250)) 
     
-    return obstacles
\ No newline at end of file
+    return ObstacleIndex(obstacles)
\ No newline at end of file
@@ -1,2 +1,9 @@
-from planning.valiant_estimator import ValiantEstimator
+from planning.valiant_estimator import ValiantEstimator, WindowedValiantEstimator, DecayedValiantEstimator
+from planning.transition_estimator import ModeTransitionEstimator, MarkovModeSampler
 from planning.mpc import CasADiMPC
+from planning.scenario_rollout import ScenarioRollout
+from planning.forecast_cache import ForecastCache
+from planning.scenario_reduction import reduce_scenarios
+from planning.solver_cache import CompiledSolver, get_compiled_solver, set_solver_cache_dir, clear_solver_cache
+from planning.async_planner import AsyncPlanner
+from planning.estimator_bank import ValiantEstimatorBank
@@ -0,0 +1,115 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class AsyncPlanner:
+    def __init__(self, mpc, deadline):
+        self.mpc = mpc
+        self.deadline = deadline
+        self.version = 0
+        self.min_valid_version = 1
+        self.applied_version = 0
+        self.stats = {
+            'submitted': 0,
+            'superseded': 0,
+            'completed': 0,
+            'applied': 0,
+            'stale': 0,
+            'late': 0
+        }
+
+        self._condition = threading.Condition()
+        self._plan_lock = threading.Lock()
+        self._pending = None
+        self._in_flight = None
+        self._result = None
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, snapshot):
+        with self._condition:
+            self.version += 1
+            if self._pending is not None:
+                self.stats['superseded'] += 1
+            self._pending = (self.version, time.perf_counter(), snapshot)
+            self.stats['submitted'] += 1
+            self._condition.notify()
+            return self.version
+
+    def busy(self):
+        with self._condition:
+            return self._pending is not None or self._in_flight is not None
+
+    def poll(self):
+        with self._condition:
+            result = self._result
+            self._result = None
+
+        if result is None:
+            return None
+
+        version, traj = result
+        if version < self.min_valid_version or version <= self.applied_version:
+            self.stats['stale'] += 1
+            return None
+
+        self.applied_version = version
+        self.stats['applied'] += 1
+        return list(traj)
+
+    def invalidate(self):
+        with self._condition:
+            self._pending = None
+            self._result = None
+            self.min_valid_version = self.version + 1
+
+    @contextmanager
+    def paused(self):
+        # Holds off the worker, waiting for a plan in flight, so the MPC can be modified safely
+        with self._plan_lock:
+            yield
+    
+    def late_fraction(self):
+        if self.stats['completed'] == 0:
+            return 0.0
+        return self.stats['late'] / self.stats['completed']
+
+    def close(self):
+        # Waits for a solve in flight, so IPOPT is never torn down under a running thread
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                self._in_flight = self._pending
+                self._pending = None
+
+            version, submitted_at, snapshot = self._in_flight
+            try:
+                with self._plan_lock:
+                    traj = self.mpc.plan(snapshot)
+            except Exception as e:
+                print(f"Asynchronous planning failed: {e}")
+                traj = None
+            latency = time.perf_counter() - submitted_at
+
+            with self._condition:
+                self._in_flight = None
+                if traj is None:
+                    continue
+                self.stats['completed'] += 1
+                if latency > self.deadline:
+                    self.stats['late'] += 1
+                if self._result is not None:
+                    self.stats['stale'] += 1
+                self._result = (version, traj)
@@ -0,0 +1,113 @@
+import numpy as np
+
+
+class ValiantEstimatorBank:
+    def __init__(self, num_streams, num_modes, confidence_threshold=0.95, delta=0.05, c=.5):
+        self.num_streams = num_streams
+        self.num_modes = num_modes
+        self.confidence_threshold = np.broadcast_to(
+            np.asarray(confidence_threshold, dtype=float), (num_streams,)
+        ).copy()
+        self.delta = delta
+        self.c = c
+        self.counts = np.zeros((num_streams, num_modes), dtype=int)
+        self.fingerprint = np.zeros((num_streams, 8), dtype=int)
+        self.fingerprint[:, 0] = num_modes
+        self.num_samples = np.zeros(num_streams, dtype=int)
+        self._rows = np.arange(num_streams)
+
+    def _reserve(self, max_count):
+        width = self.fingerprint.shape[1]
+        if max_count + 2 <= width:
+            return
+        while width < max_count + 2:
+            width *= 2
+        grown = np.zeros((self.num_streams, width), dtype=int)
+        grown[:, :self.fingerprint.shape[1]] = self.fingerprint
+        self.fingerprint = grown
+
+    def add_observations(self, modes):
+        modes = np.asarray(modes, dtype=int)
+        active = modes >= 0
+        rows = self._rows[active]
+        modes = modes[active]
+
+        counts = self.counts[rows, modes]
+        self._reserve(int(counts.max(initial=0)) + 1)
+        self.fingerprint[rows, counts] -= 1
+        self.fingerprint[rows, counts + 1] += 1
+        self.counts[rows, modes] = counts + 1
+        self.num_samples[rows] += 1
+
+    def add_sequences(self, observations):
+        observations = np.asarray(observations, dtype=int)
+        active = observations >= 0
+        rows = np.broadcast_to(self._rows[:, None], observations.shape)[active]
+        self.counts += np.bincount(
+            rows * self.num_modes + observations[active], minlength=self.num_streams * self.num_modes
+        ).reshape(self.num_streams, self.num_modes)
+        self.num_samples += active.sum(axis=1)
+        self._rebuild_fingerprint()
+
+    def _rebuild_fingerprint(self):
+        self._reserve(int(self.counts.max(initial=0)))
+        width = self.fingerprint.shape[1]
+        rows = np.broadcast_to(self._rows[:, None], self.counts.shape)
+        self.fingerprint = np.bincount(
+            (rows * width + self.counts).ravel(), minlength=self.num_streams * width
+        ).reshape(self.num_streams, width)
+
+    def observed_modes(self):
+        return (self.counts > 0).sum(axis=1)
+
+    def unseen_class_estimate(self):
+        n = np.maximum(self.num_samples, 1)
+        observed = self.observed_modes()
+        unseen_mass = self.fingerprint[:, 1] / n
+        avg_prob_per_known_mode = (1 - unseen_mass) / np.maximum(observed, 1)
+        valid = (observed > 0) & (unseen_mass > 0) & (avg_prob_per_known_mode > 0)
+        estimate = np.divide(unseen_mass, avg_prob_per_known_mode, out=np.zeros(self.num_streams), where=valid)
+        return np.maximum(0, estimate)
+
+    def support_estimate_bound(self):
+        n = self.num_samples
+        denominator = self.observed_modes() + self.unseen_class_estimate() + 1
+        bound = 1.0 - np.exp(-self.c * n / denominator)
+        return np.where(n > 0, bound, 0.0)
+
+    def sufficient_confidence(self):
+        return self.support_estimate_bound() >= self.confidence_threshold
+
+    def get_mode_probabilities(self):
+        n = np.maximum(self.num_samples, 1)[:, None]
+        counts = self.counts
+        width = self.fingerprint.shape[1]
+        r = np.take_along_axis(self.fingerprint, counts, axis=1)
+        r_plus_1 = np.take_along_axis(self.fingerprint, np.minimum(counts + 1, width - 1), axis=1)
+
+        good_turing = ((r_plus_1 + 1) / np.maximum(r, 1)) * ((counts + 1) / n)
+        probs = np.where(counts >= 5, counts / n, good_turing)
+        probs = np.where(counts >= 1, probs, 0.0)
+
+        total = probs.sum(axis=1, keepdims=True)
+        return np.divide(probs, total, out=np.zeros_like(probs), where=total > 0)
+
+    def calculate_ucb(self, mode_probs=None):
+        if mode_probs is None:
+            mode_probs = self.get_mode_probabilities()
+        n = self.num_samples[:, None]
+        margin = np.sqrt(np.log(1 / self.delta) / (2 * np.maximum(n, 1)))
+        ucb = np.minimum(1.0, mode_probs + margin)
+        return np.where((self.counts > 0) & (n > 0), ucb, 0.0)
+
+    def sample_requirement(self, target_bound):
+        target_bound = np.broadcast_to(np.asarray(target_bound, dtype=float), (self.num_streams,))
+        estimated_total_modes = self.observed_modes() + np.round(self.unseen_class_estimate())
+
+        epsilon = 1.0 - target_bound
+        epsilon = np.where(epsilon <= 0, 0.01, epsilon)
+
+        n_support = np.maximum(1, estimated_total_modes + 1)
+        required_n = (self.c * n_support**3) / (4 * epsilon**2 * np.log(np.maximum(2, n_support)))
+        required = np.maximum(0, np.ceil(required_n - self.num_samples)).astype(int)
+        return np.where(self.support_estimate_bound() >= target_bound, 0, required)
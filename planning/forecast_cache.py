@@ -0,0 +1,91 @@
+from collections import OrderedDict
+import numpy as np
+
+
+class ForecastCache:
+    def __init__(self, max_bytes=4 * 2**20, position_quantum=2.0, velocity_quantum=5.0, probability_decimals=2, max_age=1.0, time_quantum=0.1):
+        self.max_bytes = max_bytes
+        self.time_quantum = time_quantum
+        self.position_quantum = position_quantum
+        self.velocity_quantum = velocity_quantum
+        self.probability_decimals = probability_decimals
+        self.max_age = max_age
+        self.entries = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, target_state, mode_probs, num_modes, mode_sampler=None, time=None, budget=None):
+        x, y, vx, vy = target_state
+        # Half the kernels are driven by the clock, so a forecast is only valid near the time it was rolled out at
+        step = int(round(time / self.time_quantum)) if time is not None else None
+        state = (
+            int(round(x / self.position_quantum)), int(round(y / self.position_quantum)),
+            int(round(vx / self.velocity_quantum)), int(round(vy / self.velocity_quantum)),
+            step, budget
+        )
+
+        probs = np.zeros(num_modes)
+        for mode, prob in mode_probs.items():
+            if 0 <= mode < num_modes:
+                probs[mode] = prob
+        probs = tuple(np.round(probs, self.probability_decimals))
+
+        if mode_sampler is None:
+            return state, probs
+        # The Markov sampler's transition model changes the forecast as much as the marginals do
+        transitions = np.round(np.concatenate([
+            mode_sampler.stay_probabilities, mode_sampler.switch_cdf.ravel()
+        ]), self.probability_decimals)
+        return state, probs, mode_sampler.initial_mode, transitions.tobytes()
+
+    def get(self, key, time=None):
+        entry = self.entries.get(key)
+        if entry is not None and time is not None and entry['time'] is not None and time - entry['time'] > self.max_age:
+            self._remove(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, scenarios, mode_indices, forecast, time=None):
+        size = scenarios.nbytes + mode_indices.nbytes + forecast.nbytes
+        if size > self.max_bytes:
+            return
+
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = {'scenarios': scenarios, 'mode_indices': mode_indices, 'forecast': forecast, 'time': time, 'bytes': size}
+        self.bytes_used += size
+
+        while self.bytes_used > self.max_bytes:
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        self.bytes_used -= self.entries.pop(key)['bytes']
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes_used = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'bytes': self.bytes_used
+        }
@@ -3,18 +3,29 @@ import numpy as np
 import pygame
 import random
 import math
+import time
 from constants import WIDTH, HEIGHT, MAGENTA
+from planning.scenario_rollout import ScenarioRollout
+from planning.forecast_cache import ForecastCache
+from planning.occupancy import OccupancyForecast
+from planning.scenario_reduction import reduce_scenarios
+from planning.solver_cache import CompiledSolver, get_compiled_solver, solver_cache_key
+from obstacles import as_obstacle_index, obstacle_layout
 
 class CasADiMPC:
-    def __init__(self, target_agent, estimator, obstacles, horizon=10, dt=0.1):
+    def __init__(self, target_agent, estimator, obstacles, horizon=10, dt=0.1, warm_start=True, solver_mode='ipopt', solve_time_budget=0.25, obstacle_model='analytic', scenario_sampling='lattice', incremental_scenarios=False, forecast_cache_bytes=4 * 2**20, target_model='mean', num_representatives=4, scenario_reduction='kmedoids', rng=None):
         self.target_agent = target_agent
         self.estimator = estimator
-        self.obstacles = obstacles
+        self.obstacles = as_obstacle_index(obstacles)
         self.horizon = horizon
         self.dt = dt
         self.max_speed = 80
         self.safety_distance = 100
         self.obstacle_safety_distance = 50
+        self.collision_weight = 10.0
+        self.obstacle_weight = 50.0
+        self.control_weight = 0.1
+        self.stage_weights = 1.0 + np.arange(horizon + 1) / horizon
         
         self.nx = 4
         self.nu = 2
@@ -25,217 +36,475 @@ class CasADiMPC:
         self.v_min, self.v_max = -100, 100
         self.a_min, self.a_max = -30, 30
         
-        self.opti = ca.Opti()
+        self.min_scenarios = 5
+        self.max_scenarios = 40
+        self.forecast_tolerance = 5.0
+        self.num_scenarios_used = 0
+        self.rollout = ScenarioRollout(target_agent.modes, self.obstacles, horizon, dt, radius=target_agent.radius, sampling=scenario_sampling, rng=rng)
+        self.scenarios = np.zeros((0, self.horizon, 4))
+        self.incremental_scenarios = incremental_scenarios
+        self.rollover_tolerance = 40.0
+        self.scenario_time = None
+        self.scenarios_reused = 0
+        self.rollout_steps = 0
+        self.forecast_cache = ForecastCache(forecast_cache_bytes, time_quantum=dt) if forecast_cache_bytes else None
+        self.target_forecast = np.zeros((2, self.horizon))
+        self.target_model = target_model
+        self.occupancy = OccupancyForecast(horizon) if target_model == 'occupancy' else None
+        self.num_representatives = num_representatives
+        self.scenario_reduction = scenario_reduction
+        self.representatives = np.zeros((0, self.horizon, 4))
+        self.representative_weights = np.zeros(0)
+        
+        self.warm_start = warm_start
+        self.solver_mode = solver_mode
+        self.solve_time_budget = solve_time_budget
+        self.obstacle_model = obstacle_model
+        self.feasibility_tol = 1e-3
+        self.rti_qp_max_iter = 50
+        self.prev_X = None
+        self.prev_U = None
+        self.prev_lam_g = None
+        self.last_solve_iterations = 0
+        self.last_solve_time = 0.0
+        self.cold_start_fallbacks = 0
+        self.best_iterate = None
+        self.clearance_radius = 15
+        self.target_clearance = self.clearance_radius + target_agent.radius
+        self.last_plan_positions = None
+        self.plan_tier = None
+        self.tier_counts = {'optimal': 0, 'best_iterate': 0, 'shifted': 0, 'direct': 0}
+        self.plan_latencies = []
+        
+        headings = np.radians(np.arange(0, 360, 30))
+        self.heading_directions = np.vstack([np.cos(headings), np.sin(headings)])
         
-        self.X = self.opti.variable(self.nx, self.horizon + 1)
-        self.U = self.opti.variable(self.nu, self.horizon)
-        
-        self.P_target = self.opti.parameter(2, self.horizon)
-        self.P_initial = self.opti.parameter(self.nx)
-        self.P_goal = self.opti.parameter(2)
-        self.P_confidence = self.opti.parameter(1)
-        
-        self.scenarios = []
         self.planned_trajectory = []
         self.average_target_trajectory = []
         
-        self.setup_optimization_problem()
+        self.parameter_values = {}
+        self.compiled = get_compiled_solver(self.solver_key(), self.setup_optimization_problem)
+        
+    def solver_key(self):
+        return solver_cache_key(
+            self.solver_mode, self.rti_qp_max_iter, self.horizon, self.dt, self.nx, self.nu,
+            obstacle_layout(self.obstacles),
+            (self.x_min, self.x_max, self.y_min, self.y_max, self.v_min, self.v_max, self.a_min, self.a_max),
+            self.warm_start, self.solve_time_budget, self.obstacle_model,
+            self.target_model, self.occupancy.resolution if self.occupancy is not None else None,
+            self.num_representatives if self.target_model == 'representatives' else None
+        )
+        
+    def cost_parameter_values(self):
+        return {
+            'P_safety': self.safety_distance,
+            'P_obstacle_safety': self.obstacle_safety_distance,
+            'P_collision_weight': self.collision_weight,
+            'P_obstacle_weight': self.obstacle_weight,
+            'P_control_weight': self.control_weight,
+            'P_stage_weights': self.stage_weights
+        }
         
     def set_mode_probabilities(self, probabilities):
         pass
         
     def setup_optimization_problem(self):
-        self.opti.subject_to(self.X[:, 0] == self.P_initial)
+        opti = ca.Opti()
+        
+        X = opti.variable(self.nx, self.horizon + 1)
+        U = opti.variable(self.nu, self.horizon)
+        
+        P_target = opti.parameter(2, self.horizon)
+        P_initial = opti.parameter(self.nx)
+        P_goal = opti.parameter(2)
+        P_confidence = opti.parameter(1)
+        P_safety = opti.parameter(1)
+        P_obstacle_safety = opti.parameter(1)
+        P_collision_weight = opti.parameter(1)
+        P_obstacle_weight = opti.parameter(1)
+        P_control_weight = opti.parameter(1)
+        P_stage_weights = opti.parameter(self.horizon + 1)
+        
+        opti.subject_to(X[:, 0] == P_initial)
         
         for k in range(self.horizon):
-            x_next = self.X[0, k] + self.X[2, k] * self.dt + 0.5 * self.U[0, k] * self.dt**2
-            y_next = self.X[1, k] + self.X[3, k] * self.dt + 0.5 * self.U[1, k] * self.dt**2
-            vx_next = self.X[2, k] + self.U[0, k] * self.dt
-            vy_next = self.X[3, k] + self.U[1, k] * self.dt
+            x_next = X[0, k] + X[2, k] * self.dt + 0.5 * U[0, k] * self.dt**2
+            y_next = X[1, k] + X[3, k] * self.dt + 0.5 * U[1, k] * self.dt**2
+            vx_next = X[2, k] + U[0, k] * self.dt
+            vy_next = X[3, k] + U[1, k] * self.dt
             
-            self.opti.subject_to(self.X[0, k+1] == x_next)
-            self.opti.subject_to(self.X[1, k+1] == y_next)
-            self.opti.subject_to(self.X[2, k+1] == vx_next)
-            self.opti.subject_to(self.X[3, k+1] == vy_next)
+            opti.subject_to(X[0, k+1] == x_next)
+            opti.subject_to(X[1, k+1] == y_next)
+            opti.subject_to(X[2, k+1] == vx_next)
+            opti.subject_to(X[3, k+1] == vy_next)
         
         for k in range(self.horizon + 1):
-            self.opti.subject_to(self.X[0, k] >= self.x_min + 10)
-            self.opti.subject_to(self.X[0, k] <= self.x_max - 10)
-            self.opti.subject_to(self.X[1, k] >= self.y_min + 10)
-            self.opti.subject_to(self.X[1, k] <= self.y_max - 10)
-            self.opti.subject_to(self.X[2, k] >= self.v_min)
-            self.opti.subject_to(self.X[2, k] <= self.v_max)
-            self.opti.subject_to(self.X[3, k] >= self.v_min)
-            self.opti.subject_to(self.X[3, k] <= self.v_max)
+            opti.subject_to(X[0, k] >= self.x_min + 10)
+            opti.subject_to(X[0, k] <= self.x_max - 10)
+            opti.subject_to(X[1, k] >= self.y_min + 10)
+            opti.subject_to(X[1, k] <= self.y_max - 10)
+            opti.subject_to(X[2, k] >= self.v_min)
+            opti.subject_to(X[2, k] <= self.v_max)
+            opti.subject_to(X[3, k] >= self.v_min)
+            opti.subject_to(X[3, k] <= self.v_max)
         
         for k in range(self.horizon):
-            self.opti.subject_to(self.U[0, k] >= self.a_min)
-            self.opti.subject_to(self.U[0, k] <= self.a_max)
-            self.opti.subject_to(self.U[1, k] >= self.a_min)
-            self.opti.subject_to(self.U[1, k] <= self.a_max)
+            opti.subject_to(U[0, k] >= self.a_min)
+            opti.subject_to(U[0, k] <= self.a_max)
+            opti.subject_to(U[1, k] >= self.a_min)
+            opti.subject_to(U[1, k] <= self.a_max)
         
         obj = 0
         
 
         for k in range(self.horizon + 1):
-            goal_dist = ca.sumsqr(self.X[:2, k] - self.P_goal)
-            stage_weight = 1.0 + k / self.horizon
-            obj += stage_weight * goal_dist
+            goal_dist = ca.sumsqr(X[:2, k] - P_goal)
+            obj += P_stage_weights[k] * goal_dist
         
 
-        control_weight = 0.1
         for k in range(self.horizon):
-            obj += control_weight * ca.sumsqr(self.U[:, k])
+            obj += P_control_weight * ca.sumsqr(U[:, k])
         
 
-        collision_weight = 10.0 * (1.0 + 5.0 * (1.0 - self.P_confidence))
-        for k in range(self.horizon):
-            target_dist = ca.sumsqr(self.X[:2, k] - self.P_target[:, k])
-            collision_cost = ca.fmax(0, self.safety_distance**2 - target_dist)
-            obj += collision_weight * collision_cost
+        collision_weight = P_collision_weight * (1.0 + 5.0 * (1.0 - P_confidence))
+        if self.target_model == 'occupancy':
+            occupancy = self.occupancy.interpolant()
+            P_occupancy = opti.parameter(self.occupancy.num_coefficients, self.horizon)
+            for k in range(self.horizon):
+                obj += collision_weight * occupancy(X[:2, k], P_occupancy[:, k])
+        elif self.target_model == 'representatives':
+            P_representatives = opti.parameter(2 * self.num_representatives, self.horizon)
+            P_weights = opti.parameter(self.num_representatives)
+            P_clearance = opti.parameter(1)
+            for j in range(self.num_representatives):
+                for k in range(self.horizon):
+                    target_dist = ca.sumsqr(X[:2, k] - P_representatives[2 * j:2 * j + 2, k])
+                    obj += collision_weight * P_weights[j] * ca.fmax(0, P_safety**2 - target_dist)
+                    if k > 0:
+                        opti.subject_to(target_dist >= P_clearance**2)
+        else:
+            for k in range(self.horizon):
+                target_dist = ca.sumsqr(X[:2, k] - P_target[:, k])
+                collision_cost = ca.fmax(0, P_safety**2 - target_dist)
+                obj += collision_weight * collision_cost
         
 
-        obstacle_weight = 50.0
-        for obstacle in self.obstacles:
+        if self.obstacle_model == 'field':
+            distance = self.obstacles.distance_field().interpolant()
             for k in range(self.horizon + 1):
-                obstacle_center_x = obstacle.x + obstacle.width / 2
-                obstacle_center_y = obstacle.y + obstacle.height / 2
-                
-                dx = ca.fmax(0, ca.fabs(self.X[0, k] - obstacle_center_x) - obstacle.width / 2)
-                dy = ca.fmax(0, ca.fabs(self.X[1, k] - obstacle_center_y) - obstacle.height / 2)
-                squared_dist = dx**2 + dy**2
-                
-                obstacle_cost = ca.fmax(0, self.obstacle_safety_distance**2 - squared_dist)
-                obj += obstacle_weight * (obstacle_cost + 0.1 * ca.exp(0.05 * obstacle_cost))
-        
-        self.opti.minimize(obj)
-        
-        p_opts = {"expand": True}
+                dist = ca.fmax(0, distance(X[:2, k]))
+                obstacle_cost = ca.fmax(0, P_obstacle_safety**2 - dist**2)
+                obj += P_obstacle_weight * (obstacle_cost + 0.1 * ca.exp(0.05 * obstacle_cost))
+        else:
+            for obstacle in self.obstacles:
+                for k in range(self.horizon + 1):
+                    obstacle_center_x = obstacle.x + obstacle.width / 2
+                    obstacle_center_y = obstacle.y + obstacle.height / 2
+                    
+                    dx = ca.fmax(0, ca.fabs(X[0, k] - obstacle_center_x) - obstacle.width / 2)
+                    dy = ca.fmax(0, ca.fabs(X[1, k] - obstacle_center_y) - obstacle.height / 2)
+                    squared_dist = dx**2 + dy**2
+                    
+                    obstacle_cost = ca.fmax(0, P_obstacle_safety**2 - squared_dist)
+                    obj += P_obstacle_weight * (obstacle_cost + 0.1 * ca.exp(0.05 * obstacle_cost))
+        
+        opti.minimize(obj)
+        
+        parameters = {
+            'P_target': P_target, 'P_initial': P_initial, 'P_goal': P_goal, 'P_confidence': P_confidence,
+            'P_safety': P_safety, 'P_obstacle_safety': P_obstacle_safety,
+            'P_collision_weight': P_collision_weight, 'P_obstacle_weight': P_obstacle_weight,
+            'P_control_weight': P_control_weight, 'P_stage_weights': P_stage_weights
+        }
+        if self.target_model == 'occupancy':
+            parameters['P_occupancy'] = P_occupancy
+        elif self.target_model == 'representatives':
+            parameters.update({'P_representatives': P_representatives, 'P_weights': P_weights, 'P_clearance': P_clearance})
+        
+        if self.solver_mode == 'rti':
+            rti_opts = {
+                "expand": True,
+                "qpsol": "qrqp",
+                "max_iter": 1,
+                "max_iter_ls": 0,
+                "convexify_strategy": "regularize",
+                "print_header": False,
+                "print_iteration": False,
+                "print_status": False,
+                "print_time": False,
+                "error_on_fail": False,
+                "qpsol_options": {
+                    "max_iter": self.rti_qp_max_iter,
+                    "print_iter": False,
+                    "print_header": False,
+                    "print_info": False,
+                    "error_on_fail": False
+                }
+            }
+            return CompiledSolver.from_opti(opti, {'X': X, 'U': U}, parameters, 'sqpmethod', rti_opts)
+        
+        p_opts = {"expand": True, "print_time": False}
         s_opts = {"max_iter": 100, "print_level": 0}
-        self.opti.solver("ipopt", p_opts, s_opts)
+        # Without a wall-clock budget only the iteration cap applies, so the same inputs give the same plan
+        if self.solve_time_budget is not None:
+            s_opts["max_wall_time"] = self.solve_time_budget
+        if self.warm_start:
+            s_opts.update({
+                "warm_start_init_point": "yes",
+                "warm_start_bound_push": 1e-6,
+                "warm_start_mult_bound_push": 1e-6
+            })
+        
+        return CompiledSolver.from_opti(
+            opti,
+            {'X': X, 'U': U},
+            parameters,
+            'ipopt',
+            dict(p_opts, ipopt=s_opts)
+        )
     
-    def generate_target_scenarios(self):
-        scenarios = []
-        
-        mode_probs = self.estimator.get_mode_probabilities()
+    def scenario_budget(self, mode_probs, confidence):
+        probs = np.array([p for p in mode_probs.values() if p > 0], dtype=float)
+        num_modes = len(self.target_agent.modes)
+        entropy = 0.0
+        if len(probs) > 1 and num_modes > 1:
+            probs = probs / probs.sum()
+            entropy = min(1.0, -np.sum(probs * np.log(probs)) / math.log(num_modes))
+        
+        uncertainty = 1.0 - (1.0 - entropy) * confidence
+        return int(round(self.min_scenarios + uncertainty * (self.max_scenarios - self.min_scenarios)))
+    
+    def generate_target_scenarios(self, target_state=None, mode_probs=None, mode_sampler=None, confidence=None, timestamp=None):
+        if mode_probs is None:
+            mode_probs = self.estimator.get_mode_probabilities()
         
         if not mode_probs:
             if self.target_agent.modes:
                 uniform_prob = 1.0 / len(self.target_agent.modes)
                 mode_probs = {i: uniform_prob for i in range(len(self.target_agent.modes))}
             else:
-                return scenarios
+                self.scenarios = np.zeros((0, self.horizon, 4))
+                return self.scenarios
                 
-        current_pos = (self.target_agent.x, self.target_agent.y)
-        
-        num_scenarios = 20
-        for _ in range(num_scenarios):
-            scenario = [current_pos]
-            
-            vx, vy = self.target_agent.vx, self.target_agent.vy
-            
-            x, y = current_pos
-            
-            for t in range(self.horizon):
-                modes = list(mode_probs.keys())
-                weights = list(mode_probs.values())
-                
-                if sum(weights) > 0:
-                    weights = [w/sum(weights) for w in weights]
-                else:
-                    weights = [1.0/len(modes)] * len(modes)
-                
-                if modes:
-                    mode_idx = random.choices(modes, weights=weights)[0]
-                    
-                    if mode_idx < len(self.target_agent.modes):
-                        temp_target = type('obj', (), {'x': x, 'y': y, 'vx': vx, 'vy': vy})
-                        dx, dy = self.target_agent.modes[mode_idx].update_func(temp_target, self.dt)
-                        
-                        new_x = x + dx
-                        new_y = y + dy
-                        
-                        collision = False
-                        for obstacle in self.obstacles:
-                            expanded_rect = pygame.Rect(
-                                obstacle.x - self.target_agent.radius, 
-                                obstacle.y - self.target_agent.radius, 
-                                obstacle.width + 2 * self.target_agent.radius, 
-                                obstacle.height + 2 * self.target_agent.radius
-                            )
-                            if expanded_rect.collidepoint(new_x, new_y):
-                                collision = True
-                                break
-                                
-                        if not collision:
-                            x = new_x
-                            y = new_y
-                        else:
-                            vx *= -1
-                            vy *= -1
-                            
-                        vx, vy = (x - scenario[-1][0]) / self.dt, (y - scenario[-1][1]) / self.dt
-                        
-                        if x < 15:
-                            x = 15
-                            vx *= -1
-                        if x > WIDTH - 15:
-                            x = WIDTH - 15
-                            vx *= -1
-                        if y < 15:
-                            y = 15
-                            vy *= -1
-                        if y > HEIGHT - 15:
-                            y = HEIGHT - 15
-                            vy *= -1
-                            
-                        scenario.append((x, y))
-            
-            scenarios.append(scenario)
-            
-        self.scenarios = scenarios
-        return scenarios
+        if target_state is None:
+            target_state = (self.target_agent.x, self.target_agent.y, self.target_agent.vx, self.target_agent.vy)
+        
+        if confidence is None:
+            confidence = self.estimator.support_estimate_bound()
+        
+        if timestamp is None:
+            timestamp = self.target_agent.time
+        
+        budget = self.scenario_budget(mode_probs, confidence)
+        cache_key = None
+        if self.forecast_cache is not None:
+            cache_key = self.forecast_cache.key(target_state, mode_probs, len(self.target_agent.modes), mode_sampler, timestamp, budget)
+            entry = self.forecast_cache.get(cache_key, timestamp)
+            if entry is not None:
+                self.scenarios = entry['scenarios']
+                self.target_forecast = entry['forecast']
+                self.rollout.states = entry['scenarios']
+                self.rollout.mode_indices = entry['mode_indices']
+                # The restored rollout is anchored where it was generated, so later rollovers shift from there
+                self.scenario_time = entry['time']
+                self.scenarios_reused = len(self.scenarios)
+                self.rollout_steps = 0
+                self.num_scenarios_used = len(self.scenarios)
+                return self.scenarios
+        
+        reused = None
+        if self.incremental_scenarios and self.scenario_time is not None:
+            reused = self.rollout.rollover(target_state, timestamp - self.scenario_time, mode_sampler, self.rollover_tolerance)
+        steps_before = self.rollout.steps_simulated
+        
+        self.scenarios = self.rollout.generate_converged(
+            target_state, mode_probs, budget, self.min_scenarios,
+            self.forecast_tolerance, mode_sampler, reused, timestamp
+        )
+        self.scenario_time = timestamp
+        self.scenarios_reused = self.rollout.num_reused
+        self.rollout_steps = self.rollout.steps_simulated - steps_before
+        self.num_scenarios_used = len(self.scenarios)
+        if len(self.scenarios):
+            self.target_forecast = self.rollout.mean_forecast(self.scenarios)
+            if cache_key is not None:
+                self.forecast_cache.put(cache_key, self.scenarios, self.rollout.mode_indices, self.target_forecast, timestamp)
+        return self.scenarios
+    
+    def plan(self, snapshot):
+        start_time = time.perf_counter()
+        if snapshot['conservative']:
+            traj = self.plan_conservative_trajectory(
+                snapshot['current_state'], snapshot['goal_pos'],
+                target_state=snapshot['target_state'], confidence=snapshot['confidence'],
+                timestamp=snapshot.get('time')
+            )
+        else:
+            traj = self.plan_trajectory(
+                snapshot['current_state'], snapshot['goal_pos'],
+                target_state=snapshot['target_state'], mode_probs=snapshot['mode_probs'],
+                confidence=snapshot['confidence'], mode_sampler=snapshot.get('mode_sampler'),
+                timestamp=snapshot.get('time')
+            )
+        self.plan_latencies.append(time.perf_counter() - start_time)
+        return traj
     
-    def plan_trajectory(self, current_state, goal_pos):
-        scenarios = self.generate_target_scenarios()
+    def plan_trajectory(self, current_state, goal_pos, target_state=None, mode_probs=None, confidence=None, mode_sampler=None, timestamp=None):
+        if confidence is None:
+            confidence = self.estimator.support_estimate_bound()
+        scenarios = self.generate_target_scenarios(target_state, mode_probs, mode_sampler, confidence, timestamp)
         
-        if not scenarios:
+        if len(scenarios) == 0:
+            self.record_tier('direct')
             return self.plan_direct_trajectory(current_state, goal_pos)
             
-        target_traj = np.zeros((2, self.horizon))
-        avg_trajectory_points = []
-        
-        for t in range(self.horizon):
-            positions = [s[min(t, len(s)-1)] for s in scenarios]
-            x_mean = sum(p[0] for p in positions) / len(positions)
-            y_mean = sum(p[1] for p in positions) / len(positions)
-            target_traj[0, t] = x_mean
-            target_traj[1, t] = y_mean
-            avg_trajectory_points.append((x_mean, y_mean))
-        
-        self.average_target_trajectory = avg_trajectory_points
+        target_traj = self.target_forecast
+        self.average_target_trajectory = target_traj.T.tolist()
             
-        self.opti.set_value(self.P_initial, current_state)
-        self.opti.set_value(self.P_goal, goal_pos)
-        self.opti.set_value(self.P_target, target_traj)
-        
-        confidence = self.estimator.support_estimate_bound()
-        self.opti.set_value(self.P_confidence, confidence)
+        self.parameter_values = {
+            'P_target': target_traj,
+            'P_initial': current_state,
+            'P_goal': goal_pos,
+            'P_confidence': confidence,
+            **self.cost_parameter_values()
+        }
+        if self.occupancy is not None:
+            self.parameter_values['P_occupancy'] = self.occupancy.cost_maps(scenarios, self.safety_distance)
+        elif self.target_model == 'representatives':
+            self.parameter_values.update(self.representative_parameter_values(scenarios))
         
         try:
-            sol = self.opti.solve()
-            
-            X_opt = sol.value(self.X)
-            U_opt = sol.value(self.U)
+            X_opt, U_opt = self.solve(current_state)
             
             traj = [(X_opt[0, k], X_opt[1, k]) for k in range(self.horizon + 1)]
             self.planned_trajectory = traj
+            self.last_plan_positions = np.array(X_opt[:2])
             
             return traj
             
         except Exception as e:
             print(f"Optimization failed: {e}")
-            return self.plan_direct_trajectory(current_state, goal_pos)
+            
+        traj = self.shift_previous_plan(current_state)
+        if traj is not None and self.path_clear(np.array(traj).T):
+            self.record_tier('shifted')
+            return traj
+        
+        self.record_tier('direct')
+        return self.plan_direct_trajectory(current_state, goal_pos)
+    
+    def representative_parameter_values(self, scenarios):
+        self.representatives, self.representative_weights = reduce_scenarios(
+            scenarios, self.num_representatives, self.scenario_reduction
+        )
+        # Unused slots sit far outside the arena with zero weight, so their constraints never bind
+        positions = np.full((2 * self.num_representatives, self.horizon), -10.0 * (WIDTH + HEIGHT))
+        weights = np.zeros(self.num_representatives)
+        count = len(self.representatives)
+        positions[:2 * count] = self.representatives[:, :, :2].transpose(0, 2, 1).reshape(2 * count, self.horizon)
+        weights[:count] = self.representative_weights
+        return {'P_representatives': positions, 'P_weights': weights, 'P_clearance': self.target_clearance}
+    
+    def record_tier(self, tier):
+        self.plan_tier = tier
+        self.tier_counts[tier] += 1
+    
+    def shift_previous_plan(self, current_state):
+        if self.last_plan_positions is None:
+            return None
+        
+        positions = self.last_plan_positions
+        dists = np.hypot(positions[0] - current_state[0], positions[1] - current_state[1])
+        remaining = positions[:, np.argmin(dists) + 1:]
+        if remaining.shape[1] == 0:
+            return None
+        
+        return [(current_state[0], current_state[1])] + [tuple(p) for p in remaining.T]
+    
+    def path_clear(self, positions):
+        for k in range(positions.shape[1] - 1):
+            if self.obstacles.collides_segment(tuple(positions[:, k]), tuple(positions[:, k + 1]), self.clearance_radius):
+                return False
+        return True
+    
+    def carries_iterate(self):
+        return self.warm_start or self.solver_mode == 'rti'
+    
+    def solve(self, current_state):
+        self.last_solve_time = 0.0
+        self.best_iterate = None
+        if self.carries_iterate() and self.prev_X is not None:
+            X_init = np.hstack([self.prev_X[:, 1:], self.prev_X[:, -1:]])
+            X_init[:, 0] = current_state
+            U_init = np.hstack([self.prev_U[:, 1:], self.prev_U[:, -1:]])
+            
+            try:
+                return self._solve_from(X_init, U_init, self.prev_lam_g)
+            except RuntimeError:
+                self.cold_start_fallbacks += 1
+                if self.solve_time_budget is not None and self.last_solve_time > self.solve_time_budget / 2:
+                    return self._accept_best_iterate()
+        
+        self.reset_warm_start()
+        X_init = np.tile(np.reshape(current_state, (self.nx, 1)), (1, self.horizon + 1))
+        U_init = np.zeros((self.nu, self.horizon))
+        try:
+            return self._solve_from(X_init, U_init, np.zeros(self.compiled.ng))
+        except RuntimeError:
+            return self._accept_best_iterate()
+    
+    def _solve_from(self, X_init, U_init, lam_g0):
+        start_time = time.perf_counter()
+        values, lam_g, stats = self.compiled.solve(self.parameter_values, {'X': X_init, 'U': U_init}, lam_g0)
+        self.last_solve_time += time.perf_counter() - start_time
+        self.last_solve_iterations = stats['iter_count']
+        if not self.solve_succeeded(stats, values):
+            if self.is_feasible(stats, values):
+                if self.best_iterate is None or stats['objective'] < self.best_iterate[2]:
+                    self.best_iterate = (values, lam_g, stats['objective'])
+            raise RuntimeError(f"Solver failed. return_status is '{stats['return_status']}'")
+        
+        self.record_tier('optimal')
+        return self._keep_iterate(values, lam_g)
+    
+    def _accept_best_iterate(self):
+        if self.best_iterate is None:
+            raise RuntimeError("Solver failed and no feasible iterate is available")
+        
+        values, lam_g, _ = self.best_iterate
+        if not self.path_clear(values['X'][:2]):
+            raise RuntimeError("Best feasible iterate runs into an obstacle")
+        
+        self.record_tier('best_iterate')
+        return self._keep_iterate(values, lam_g)
+    
+    def _keep_iterate(self, values, lam_g):
+        if self.carries_iterate():
+            self.prev_X = values['X']
+            self.prev_U = values['U']
+            self.prev_lam_g = lam_g
+        return values['X'], values['U']
+    
+    def is_feasible(self, stats, values):
+        return stats['constraint_violation'] < self.feasibility_tol and np.all(np.isfinite(values['X']))
+    
+    def solve_succeeded(self, stats, values):
+        if self.solver_mode == 'rti':
+            accepted = stats['success'] or stats['return_status'] == 'Maximum_Iterations_Exceeded'
+            return accepted and self.is_feasible(stats, values)
+        return stats['success']
+    
+    def reset(self):
+        self.reset_warm_start()
+        self.last_plan_positions = None
+        self.scenario_time = None
+        if self.forecast_cache is not None:
+            self.forecast_cache.clear()
+    
+    def reset_warm_start(self):
+        self.prev_X = None
+        self.prev_U = None
+        self.prev_lam_g = None
             
     def plan_direct_trajectory(self, current_state, goal_pos):
         x, y, vx, vy = current_state
@@ -254,36 +523,12 @@ class CasADiMPC:
 
         for _ in range(self.horizon):
 
-            blocked = False
-            for obstacle in self.obstacles:
-
-                expanded_rect = pygame.Rect(
-                    obstacle.x - 20, 
-                    obstacle.y - 20, 
-                    obstacle.width + 40, 
-                    obstacle.height + 40
-                )
-                if expanded_rect.clipline((x, y), (goal_pos[0], goal_pos[1])):
-                    blocked = True
-                    break
+            blocked = self.obstacles.collides_segment((x, y), (goal_pos[0], goal_pos[1]), 20)
             
 
             if blocked:
 
-                nearest_dist = float('inf')
-                nearest_obstacle = None
-                
-                for obstacle in self.obstacles:
-
-                    obs_center_x = obstacle.x + obstacle.width / 2
-                    obs_center_y = obstacle.y + obstacle.height / 2
-                    
-
-                    obs_dist = math.sqrt((x - obs_center_x)**2 + (y - obs_center_y)**2)
-                    
-                    if obs_dist < nearest_dist:
-                        nearest_dist = obs_dist
-                        nearest_obstacle = obstacle
+                nearest_obstacle, nearest_dist = self.obstacles.nearest(x, y)
                 
                 if nearest_obstacle:
 
@@ -321,19 +566,7 @@ class CasADiMPC:
             next_y = y + dy * move_dist
             
 
-            collision = False
-            for obstacle in self.obstacles:
-                expanded_rect = pygame.Rect(
-                    obstacle.x - 20, 
-                    obstacle.y - 20, 
-                    obstacle.width + 40, 
-                    obstacle.height + 40
-                )
-                if expanded_rect.collidepoint(next_x, next_y):
-                    collision = True
-                    break
-            
-            if not collision:
+            if not self.obstacles.collides_point(next_x, next_y, 20):
                 x, y = next_x, next_y
                 traj.append((x, y))
                 
@@ -344,85 +577,58 @@ class CasADiMPC:
                     break
             else:
 
-                best_angle = 0
-                best_dist = float('inf')
+                test_x = x + self.heading_directions[0] * move_dist
+                test_y = y + self.heading_directions[1] * move_dist
+                free = ~self.obstacles.collides_points(test_x, test_y, 20)
                 
-                for angle in range(0, 360, 30):
-                    rad = math.radians(angle)
-                    test_dx = math.cos(rad)
-                    test_dy = math.sin(rad)
-                    test_x = x + test_dx * move_dist
-                    test_y = y + test_dy * move_dist
-                    
-
-                    test_collision = False
-                    for obstacle in self.obstacles:
-                        expanded_rect = pygame.Rect(
-                            obstacle.x - 20, 
-                            obstacle.y - 20, 
-                            obstacle.width + 40, 
-                            obstacle.height + 40
-                        )
-                        if expanded_rect.collidepoint(test_x, test_y):
-                            test_collision = True
-                            break
-                    
-                    if not test_collision:
-
-                        test_dist = math.sqrt((goal_pos[0] - test_x)**2 + (goal_pos[1] - test_y)**2)
-                        if test_dist < best_dist:
-                            best_dist = test_dist
-                            best_angle = angle
-                
-                if best_dist < float('inf'):
-                    rad = math.radians(best_angle)
-                    dx = math.cos(rad)
-                    dy = math.sin(rad)
-                    x += dx * move_dist
-                    y += dy * move_dist
-                    traj.append((x, y))
-                else:
-
-                    traj.append((x, y))
+                if free.any():
+                    test_dist = np.hypot(goal_pos[0] - test_x, goal_pos[1] - test_y)
+                    best = int(np.argmin(np.where(free, test_dist, np.inf)))
+                    x = float(test_x[best])
+                    y = float(test_y[best])
+                traj.append((x, y))
                 
         return traj
         
-    def plan_conservative_trajectory(self, current_state, goal_pos):
+    def plan_conservative_trajectory(self, current_state, goal_pos, target_state=None, confidence=None, timestamp=None):
+        mode_probs = None
         if self.target_agent.modes:
             uniform_prob = 1.0 / len(self.target_agent.modes)
-            self.estimator.estimated_modes['probabilities'] = {i: uniform_prob for i in range(len(self.target_agent.modes))}
+            mode_probs = {i: uniform_prob for i in range(len(self.target_agent.modes))}
         
         original_safety_distance = self.safety_distance
         self.safety_distance *= 2.0  
         
-        traj = self.plan_trajectory(current_state, goal_pos)
+        traj = self.plan_trajectory(current_state, goal_pos, target_state, mode_probs, confidence, timestamp=timestamp)
         
         self.safety_distance = original_safety_distance
         
         return traj
         
     def draw_scenarios(self, surface):
-        subset_size = min(5, len(self.scenarios))
+        scenarios = self.scenarios
+        subset_size = min(5, len(scenarios))
         if subset_size == 0:
             return
             
-        subset = random.sample(self.scenarios, subset_size)
+        subset = random.sample(range(len(scenarios)), subset_size)
         
-        for scenario in subset:
+        for idx in subset:
             color = (180, 180, 180)
             
-            if len(scenario) > 1:
-                pygame.draw.lines(surface, color, False, scenario, 1)
+            if self.horizon > 1:
+                pygame.draw.lines(surface, color, False, scenarios[idx, :, :2].tolist(), 1)
         
 
-        if self.average_target_trajectory and len(self.average_target_trajectory) > 1:
+        average_target_trajectory = self.average_target_trajectory
+        if average_target_trajectory and len(average_target_trajectory) > 1:
 
-            pygame.draw.lines(surface, MAGENTA, False, self.average_target_trajectory, 2)
+            pygame.draw.lines(surface, MAGENTA, False, average_target_trajectory, 2)
             
 
-            if len(self.average_target_trajectory) > 2:
-                end_point = self.average_target_trajectory[-1]
-                prev_point = self.average_target_trajectory[-2]
+            if len(average_target_trajectory) > 2:
+                end_point = average_target_trajectory[-1]
+                prev_point = average_target_trajectory[-2]
                 
 
                 dx = end_point[0] - prev_point[0]
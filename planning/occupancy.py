@@ -0,0 +1,58 @@
+import casadi as ca
+import numpy as np
+from constants import WIDTH, HEIGHT
+
+
+class OccupancyForecast:
+    def __init__(self, horizon, width=WIDTH, height=HEIGHT, resolution=20):
+        self.horizon = horizon
+        self.resolution = resolution
+        self.xs = np.arange(0, width + resolution, resolution, dtype=float)
+        self.ys = np.arange(0, height + resolution, resolution, dtype=float)
+        self.shape = (len(self.xs), len(self.ys))
+        self.num_coefficients = self.shape[0] * self.shape[1]
+        self.probabilities = np.zeros((horizon,) + self.shape)
+        self._kernels = {}
+        self._interpolant = None
+
+    def rasterize(self, scenarios):
+        num_scenarios = len(scenarios)
+        if num_scenarios == 0:
+            self.probabilities = np.zeros((self.horizon,) + self.shape)
+            return self.probabilities
+
+        steps = np.broadcast_to(np.arange(self.horizon), (num_scenarios, self.horizon))
+        samples = np.column_stack([steps.ravel(), scenarios[:, :, 0].ravel(), scenarios[:, :, 1].ravel()])
+        half = self.resolution / 2
+        counts, _ = np.histogramdd(samples, bins=(self.horizon,) + self.shape, range=[
+            (-0.5, self.horizon - 0.5),
+            (self.xs[0] - half, self.xs[-1] + half),
+            (self.ys[0] - half, self.ys[-1] + half)
+        ])
+        self.probabilities = counts / num_scenarios
+        return self.probabilities
+
+    def _kernel_spectrum(self, safety_distance):
+        key = float(safety_distance)
+        if key not in self._kernels:
+            reach = int(np.ceil(safety_distance / self.resolution))
+            offsets = np.arange(-reach, reach + 1) * self.resolution
+            kernel = np.maximum(0, safety_distance**2 - offsets[:, None]**2 - offsets[None, :]**2)
+
+            padded = (self.shape[0] + 2 * reach, self.shape[1] + 2 * reach)
+            self._kernels[key] = (reach, padded, np.fft.rfft2(kernel, padded))
+        return self._kernels[key]
+
+    def cost_maps(self, scenarios, safety_distance):
+        # Expected hinge collision cost over all scenarios, i.e. occupancy convolved with the hinge kernel
+        probabilities = self.rasterize(scenarios)
+        reach, padded, spectrum = self._kernel_spectrum(safety_distance)
+        costs = np.fft.irfft2(np.fft.rfft2(probabilities, padded) * spectrum, padded)
+        costs = np.maximum(costs[:, reach:reach + self.shape[0], reach:reach + self.shape[1]], 0)
+        # CasADi interpolant coefficients run with the first grid axis fastest
+        return costs.transpose(0, 2, 1).reshape(self.horizon, -1).T
+
+    def interpolant(self):
+        if self._interpolant is None:
+            self._interpolant = ca.interpolant('target_occupancy', 'linear', [self.xs, self.ys], 1)
+        return self._interpolant
@@ -0,0 +1,53 @@
+import numpy as np
+
+REDUCTIONS = ('farthest', 'kmedoids')
+
+
+def trajectory_distances(scenarios):
+    flat = scenarios[:, :, :2].reshape(len(scenarios), -1)
+    squared = np.sum(flat**2, axis=1)
+    gram = flat @ flat.T
+    return np.sqrt(np.maximum(squared[:, None] + squared[None, :] - 2 * gram, 0) / scenarios.shape[1])
+
+
+def farthest_point_indices(distances, k):
+    selected = [int(np.argmin(distances.sum(axis=1)))]
+    nearest = distances[selected[0]].copy()
+    for _ in range(1, min(k, len(distances))):
+        candidate = int(np.argmax(nearest))
+        if nearest[candidate] <= 0:
+            break
+        selected.append(candidate)
+        nearest = np.minimum(nearest, distances[candidate])
+    return np.array(selected)
+
+
+def kmedoids_indices(distances, k, iterations=10):
+    medoids = farthest_point_indices(distances, k)
+    for _ in range(iterations):
+        labels = np.argmin(distances[:, medoids], axis=1)
+        members = labels[:, None] == np.arange(len(medoids))[None, :]
+        # Total distance from every scenario to each cluster, restricted to that cluster's members
+        costs = np.where(members, distances @ members, np.inf)
+        updated = np.where(members.any(axis=0), np.argmin(costs, axis=0), medoids)
+        if np.array_equal(updated, medoids):
+            break
+        medoids = updated
+    return medoids
+
+
+def reduce_scenarios(scenarios, k, method='kmedoids'):
+    if len(scenarios) == 0:
+        return scenarios, np.zeros(0)
+
+    distances = trajectory_distances(scenarios)
+    if method == 'farthest':
+        indices = farthest_point_indices(distances, k)
+    elif method == 'kmedoids':
+        indices = kmedoids_indices(distances, k)
+    else:
+        raise ValueError(f"Unknown scenario reduction '{method}'")
+
+    labels = np.argmin(distances[:, indices], axis=1)
+    weights = np.bincount(labels, minlength=len(indices)) / len(scenarios)
+    return scenarios[indices], weights
@@ -0,0 +1,227 @@
+import numpy as np
+from constants import WIDTH, HEIGHT
+from obstacles import as_obstacle_index
+from planning.scenario_sampling import UniformStream, sample_uniforms
+
+
+class ScenarioRollout:
+    def __init__(self, modes, obstacles, horizon, dt, radius=15, sampling='mc', rng=None):
+        self.modes = modes
+        self.horizon = horizon
+        self.dt = dt
+        self.radius = radius
+        self.sampling = sampling
+        self.rng = rng if rng is not None else np.random
+        self.kernel_uniforms = 3
+        self.states = np.zeros((0, horizon, 4))
+        self.mode_indices = np.zeros((0, horizon - 1), dtype=int)
+        self.steps_simulated = 0
+        self.num_reused = 0
+        self.set_obstacles(obstacles)
+
+    def set_obstacles(self, obstacles):
+        self.obstacle_index = as_obstacle_index(obstacles)
+
+    def sample_modes(self, mode_probs, num_scenarios, uniforms=None, steps=None):
+        if steps is None:
+            steps = self.horizon - 1
+        valid = [(m, w) for m, w in mode_probs.items() if 0 <= m < len(self.modes)]
+        if not valid:
+            return None
+
+        mode_ids = np.array([m for m, _ in valid], dtype=int)
+        weights = np.array([w for _, w in valid], dtype=float)
+        total = weights.sum()
+        if total > 0:
+            weights = weights / total
+        else:
+            weights = np.full(len(mode_ids), 1.0 / len(mode_ids))
+
+        if uniforms is None:
+            return self.rng.choice(mode_ids, size=(num_scenarios, steps), p=weights)
+        picks = np.searchsorted(np.cumsum(weights), uniforms, side='right')
+        return mode_ids[np.minimum(picks, len(mode_ids) - 1)]
+
+    def collides(self, x, y):
+        return self.obstacle_index.collides_points(x, y, self.radius)
+
+    def rollout(self, initial_state, mode_indices, step_uniforms=None, time_val=0.0):
+        num_scenarios, num_steps = mode_indices.shape
+        states = np.empty((num_scenarios, num_steps + 1, 4))
+        states[:, 0] = initial_state
+
+        x = states[:, 0, 0].copy()
+        y = states[:, 0, 1].copy()
+        vx = states[:, 0, 2].copy()
+        vy = states[:, 0, 3].copy()
+        r = self.radius
+
+        for t in range(1, num_steps + 1):
+            step_modes = mode_indices[:, t - 1]
+            dx = np.zeros(num_scenarios)
+            dy = np.zeros(num_scenarios)
+            for mode_idx in np.unique(step_modes):
+                mask = step_modes == mode_idx
+                rng = UniformStream(step_uniforms[mask, t - 1], self.rng) if step_uniforms is not None else self.rng
+                dx[mask], dy[mask] = self._displace(
+                    mode_idx, x[mask], y[mask], vx[mask], vy[mask], rng, time_val + (t - 1) * self.dt
+                )
+
+            new_x = x + dx
+            new_y = y + dy
+            blocked = self.collides(new_x, new_y)
+            prev_x, prev_y = x, y
+            x = np.where(blocked, x, new_x)
+            y = np.where(blocked, y, new_y)
+            vx = (x - prev_x) / self.dt
+            vy = (y - prev_y) / self.dt
+
+            low = x < r
+            high = x > WIDTH - r
+            x = np.clip(x, r, WIDTH - r)
+            vx = np.where(low | high, -vx, vx)
+
+            low = y < r
+            high = y > HEIGHT - r
+            y = np.clip(y, r, HEIGHT - r)
+            vy = np.where(low | high, -vy, vy)
+
+            states[:, t, 0] = x
+            states[:, t, 1] = y
+            states[:, t, 2] = vx
+            states[:, t, 3] = vy
+
+        self.steps_simulated += num_scenarios * num_steps
+        return states
+
+    def _displace(self, mode_idx, x, y, vx, vy, rng=None, time_val=0.0):
+        dx, dy, _, _ = self.modes[mode_idx].update_batch(x, y, vx, vy, self.dt, time_val, rng)
+        return dx, dy
+
+    def sample_scenario_uniforms(self, num_scenarios, steps=None):
+        if self.sampling == 'mc':
+            return None
+        if steps is None:
+            steps = self.horizon - 1
+        per_step = 2 + self.kernel_uniforms
+        uniforms = sample_uniforms(self.sampling, num_scenarios, steps * per_step, self.rng)
+        return uniforms.reshape(num_scenarios, steps, per_step)
+
+    def generate(self, initial_state, mode_probs, num_scenarios, mode_sampler=None, time_val=0.0):
+        uniforms = self.sample_scenario_uniforms(num_scenarios)
+        mode_uniforms = uniforms[:, :, :2] if uniforms is not None else None
+        step_uniforms = uniforms[:, :, 2:] if uniforms is not None else None
+
+        if mode_sampler is not None:
+            mode_indices = mode_sampler.sample(num_scenarios, self.horizon - 1, mode_uniforms, rng=self.rng)
+        else:
+            mode_indices = self.sample_modes(
+                mode_probs, num_scenarios, mode_uniforms[:, :, 0] if mode_uniforms is not None else None
+            )
+        if mode_indices is None:
+            self.states = np.zeros((0, self.horizon, 4))
+            self.mode_indices = np.zeros((0, self.horizon - 1), dtype=int)
+            return self.states
+        self.states = self.rollout(initial_state, mode_indices, step_uniforms, time_val)
+        self.mode_indices = mode_indices
+        return self.states
+
+    def rollover(self, observed_state, elapsed, mode_sampler=None, tolerance=40.0):
+        shift = int(round(elapsed / self.dt))
+        if len(self.states) == 0 or not 1 <= shift <= self.horizon - 2:
+            return None
+
+        observed = np.asarray(observed_state, dtype=float)
+        offsets = observed[:2] - self.states[:, shift, :2]
+        errors = np.hypot(offsets[:, 0], offsets[:, 1])
+        if mode_sampler is not None and mode_sampler.initial_mode is not None:
+            errors[self.mode_indices[:, shift - 1] != mode_sampler.initial_mode] = np.inf
+        keep = np.argsort(errors)
+        keep = keep[errors[keep] <= tolerance]
+        if len(keep) == 0:
+            return None
+
+        # Re-anchor the still-valid heads on the observed state; their tails are simulated on demand
+        head = self.horizon - shift
+        states = np.empty((len(keep), self.horizon, 4))
+        states[:, :head] = self.states[keep, shift:]
+        states[:, :head, :2] += offsets[keep, None, :]
+        states[:, 0, 2:] = observed[2:]
+        modes = np.empty((len(keep), self.horizon - 1), dtype=int)
+        modes[:, :head - 1] = self.mode_indices[keep, shift:]
+        return states, modes, shift
+
+    def extend_rollover(self, reused, num_scenarios, mode_probs, mode_sampler=None, time_val=0.0):
+        states, modes, shift = reused
+        states = states[:num_scenarios].copy()
+        modes = modes[:num_scenarios].copy()
+        num_scenarios = len(states)
+        head = self.horizon - shift
+
+        uniforms = self.sample_scenario_uniforms(num_scenarios, shift)
+        mode_uniforms = uniforms[:, :, :2] if uniforms is not None else None
+        step_uniforms = uniforms[:, :, 2:] if uniforms is not None else None
+        if mode_sampler is not None:
+            tail_modes = mode_sampler.sample(num_scenarios, shift, mode_uniforms, initial_modes=modes[:, head - 2], rng=self.rng)
+        else:
+            tail_modes = self.sample_modes(
+                mode_probs, num_scenarios, mode_uniforms[:, :, 0] if mode_uniforms is not None else None, shift
+            )
+        if tail_modes is None:
+            return states[:0], modes[:0]
+
+        modes[:, head - 1:] = tail_modes
+        states[:, head - 1:] = self.rollout(
+            states[:, head - 1], tail_modes, step_uniforms, time_val + (head - 1) * self.dt
+        )
+        return states, modes
+
+    def generate_converged(self, initial_state, mode_probs, max_scenarios, min_scenarios, tolerance, mode_sampler=None, reused=None, time_val=0.0):
+        # Reused scenarios fill the budget but only fresh ones drive the variance estimate
+        batches = []
+        mode_batches = []
+        total = 0
+        fresh = 0
+        self.num_reused = 0
+        batch_size = min(min_scenarios, max_scenarios)
+        position_sum = np.zeros((self.horizon, 2))
+        position_sq_sum = np.zeros((self.horizon, 2))
+
+        while batch_size > 0:
+            batch = self.generate(initial_state, mode_probs, batch_size, mode_sampler, time_val)
+            if len(batch) == 0:
+                break
+            
+            batches.append(batch)
+            mode_batches.append(self.mode_indices)
+            total += len(batch)
+            fresh += len(batch)
+            positions = batch[:, :, :2]
+            position_sum += positions.sum(axis=0)
+            position_sq_sum += (positions**2).sum(axis=0)
+            if fresh < 2:
+                break
+            
+            variance = np.maximum(position_sq_sum - position_sum**2 / fresh, 0) / (fresh - 1)
+            required = int(np.ceil(variance.max() / tolerance**2))
+            batch_size = min(required, max_scenarios) - total
+            if reused is not None and batch_size > 0:
+                states, modes = self.extend_rollover(reused, batch_size, mode_probs, mode_sampler, time_val)
+                batches.append(states)
+                mode_batches.append(modes)
+                total += len(states)
+                batch_size -= len(states)
+                self.num_reused = len(states)
+                reused = None
+
+        if batches:
+            self.states = np.concatenate(batches)
+            self.mode_indices = np.concatenate(mode_batches)
+        else:
+            self.states = np.zeros((0, self.horizon, 4))
+            self.mode_indices = np.zeros((0, self.horizon - 1), dtype=int)
+        return self.states
+
+    @staticmethod
+    def mean_forecast(states):
+        return states[:, :, :2].mean(axis=0).T
@@ -0,0 +1,45 @@
+import math
+import numpy as np
+
+STRATEGIES = ('mc', 'stratified', 'lattice', 'antithetic')
+
+
+def korobov_lattice(num_points, dims):
+    generator = max(1, int(round(num_points * 0.6180339887)))
+    while math.gcd(generator, num_points) != 1:
+        generator += 1
+    powers = np.ones(dims, dtype=np.int64)
+    for j in range(1, dims):
+        powers[j] = (powers[j - 1] * generator) % num_points
+    return (np.arange(num_points)[:, None] * powers[None, :] % num_points) / num_points
+
+
+def sample_uniforms(strategy, num_points, dims, rng=np.random):
+    if strategy == 'mc':
+        return rng.random((num_points, dims))
+    if strategy == 'stratified':
+        strata = np.argsort(rng.random((num_points, dims)), axis=0)
+        return (strata + rng.random((num_points, dims))) / num_points
+    if strategy == 'lattice':
+        return (korobov_lattice(num_points, dims) + rng.random(dims)) % 1.0
+    if strategy == 'antithetic':
+        half = rng.random(((num_points + 1) // 2, dims))
+        return np.stack([half, 1.0 - half], axis=1).reshape(-1, dims)[:num_points]
+    raise ValueError(f"Unknown sampling strategy '{strategy}'")
+
+
+class UniformStream:
+    def __init__(self, uniforms, rng=np.random):
+        self.uniforms = uniforms
+        self.rng = rng
+        self.column = 0
+
+    def random(self, size=None):
+        if self.column >= self.uniforms.shape[1]:
+            return self.rng.random(size)
+        values = self.uniforms[:, self.column]
+        self.column += 1
+        return values
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        return low + (high - low) * self.random(size)
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import casadi as ca
+import numpy as np
+
+_SOLVER_CACHE = {}
+_CACHE_DIR = None
+
+
+class CompiledSolver:
+    FUNCTIONS = ('solver', 'pack_p', 'pack_x', 'unpack_x', 'bounds')
+
+    def __init__(self, solver, pack_p, pack_x, unpack_x, bounds):
+        self.solver = solver
+        self.pack_p = pack_p
+        self.pack_x = pack_x
+        self.unpack_x = unpack_x
+        self.bounds = bounds
+        self.ng = solver.size1_out('g')
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_opti(cls, opti, variables, parameters, plugin, options):
+        var_names = list(variables.keys())
+        par_names = list(parameters.keys())
+        var_syms = [variables[name] for name in var_names]
+        par_syms = [parameters[name] for name in par_names]
+
+        nlp = {'x': opti.x, 'p': opti.p, 'f': opti.f, 'g': opti.g}
+        solver = ca.nlpsol('mpc_solver', plugin, nlp, options)
+        pack_p = ca.Function('pack_p', par_syms, [opti.p], par_names, ['p'])
+        pack_x = ca.Function('pack_x', var_syms, [opti.x], var_names, ['x'])
+        unpack_x = ca.Function('unpack_x', [opti.x], var_syms, ['x'], var_names)
+        bounds = ca.Function('bounds', [opti.p], [opti.lbg, opti.ubg], ['p'], ['lbg', 'ubg'])
+        return cls(solver, pack_p, pack_x, unpack_x, bounds)
+
+    def solve(self, params, initial, lam_g0=None):
+        p = self.pack_p(**params)['p']
+        x0 = self.pack_x(**initial)['x']
+        bounds = self.bounds(p=p)
+        args = dict(bounds, x0=x0, p=p)
+        if lam_g0 is not None:
+            args['lam_g0'] = lam_g0
+
+        with self._lock:
+            res = self.solver(**args)
+            stats = dict(self.solver.stats())
+        g = np.array(res['g']).flatten()
+        lbg = np.array(bounds['lbg']).flatten()
+        ubg = np.array(bounds['ubg']).flatten()
+        violation = np.maximum(lbg - g, g - ubg)
+        stats['constraint_violation'] = float(np.max(violation, initial=0.0))
+        stats['objective'] = float(res['f'])
+        values = {name: np.array(value) for name, value in self.unpack_x(x=res['x']).items()}
+        return values, np.array(res['lam_g']).flatten(), stats
+
+    def save(self, path):
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(path) or '.')
+        for name in self.FUNCTIONS:
+            getattr(self, name).save(os.path.join(tmp_dir, name + '.casadi'))
+        try:
+            os.replace(tmp_dir, path)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path):
+        return cls(*(ca.Function.load(os.path.join(path, name + '.casadi')) for name in cls.FUNCTIONS))
+
+
+def set_solver_cache_dir(path):
+    global _CACHE_DIR
+    if path is not None:
+        os.makedirs(path, exist_ok=True)
+    _CACHE_DIR = path
+
+
+def clear_solver_cache():
+    _SOLVER_CACHE.clear()
+
+
+def solver_cache_key(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def get_compiled_solver(key, build):
+    compiled = _SOLVER_CACHE.get(key)
+    if compiled is not None:
+        return compiled
+
+    path = os.path.join(_CACHE_DIR, key) if _CACHE_DIR else None
+    if path and os.path.isdir(path):
+        try:
+            compiled = CompiledSolver.load(path)
+        except Exception:
+            compiled = None
+
+    if compiled is None:
+        compiled = build()
+        if path:
+            compiled.save(path)
+
+    _SOLVER_CACHE[key] = compiled
+    return compiled
@@ -0,0 +1,81 @@
+import numpy as np
+
+
+class ModeTransitionEstimator:
+    def __init__(self, num_modes, observation_interval, alpha=1.0, prior_dwell=1.0):
+        self.num_modes = num_modes
+        self.observation_interval = observation_interval
+        self.alpha = alpha
+        self.prior_dwell = prior_dwell
+        self.transition_counts = np.zeros((num_modes, num_modes))
+        self.dwell_totals = np.zeros(num_modes)
+        self.dwell_runs = np.zeros(num_modes)
+        self.current_mode = None
+        self.current_dwell = 0
+
+    def add_observation(self, mode_idx):
+        if not 0 <= mode_idx < self.num_modes:
+            return
+
+        if self.current_mode is not None:
+            self.transition_counts[self.current_mode, mode_idx] += 1
+            if mode_idx != self.current_mode:
+                self.dwell_totals[self.current_mode] += self.current_dwell
+                self.dwell_runs[self.current_mode] += 1
+                self.current_dwell = 0
+
+        self.current_mode = mode_idx
+        self.current_dwell += 1
+
+    def mean_dwell(self):
+        observed = self.dwell_totals * self.observation_interval
+        return (observed + self.prior_dwell) / (self.dwell_runs + 1)
+
+    def switch_probabilities(self, mode_probs=None):
+        prior = np.full(self.num_modes, 1.0)
+        if mode_probs:
+            prior = np.zeros(self.num_modes)
+            for mode, prob in mode_probs.items():
+                if 0 <= mode < self.num_modes:
+                    prior[mode] = prob
+        if prior.sum() <= 0:
+            prior = np.full(self.num_modes, 1.0)
+        prior = prior / prior.sum()
+
+        weights = self.transition_counts + self.alpha * prior[None, :]
+        np.fill_diagonal(weights, 0.0)
+        totals = weights.sum(axis=1, keepdims=True)
+        return np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+
+    def sampler(self, dt, mode_probs=None):
+        stay = np.exp(-dt / self.mean_dwell())
+        switch = self.switch_probabilities(mode_probs)
+        stay[switch.sum(axis=1) == 0] = 1.0
+        return MarkovModeSampler(stay, switch, self.current_mode)
+
+
+class MarkovModeSampler:
+    def __init__(self, stay_probabilities, switch_probabilities, initial_mode=None):
+        self.stay_probabilities = stay_probabilities
+        self.switch_cdf = np.cumsum(switch_probabilities, axis=1)
+        self.initial_mode = initial_mode
+
+    def sample(self, num_scenarios, steps, uniforms=None, initial_modes=None, rng=np.random):
+        num_modes = len(self.stay_probabilities)
+        if uniforms is None:
+            uniforms = rng.random((num_scenarios, steps, 2))
+        if initial_modes is not None:
+            current = np.asarray(initial_modes, dtype=int).copy()
+        elif self.initial_mode is None:
+            current = rng.choice(num_modes, size=num_scenarios)
+        else:
+            current = np.full(num_scenarios, self.initial_mode)
+
+        modes = np.empty((num_scenarios, steps), dtype=int)
+        for t in range(steps):
+            switch = uniforms[:, t, 0] >= self.stay_probabilities[current]
+            u = uniforms[:, t, 1:2] * self.switch_cdf[current, -1:]
+            drawn = np.minimum((self.switch_cdf[current] <= u).sum(axis=1), num_modes - 1)
+            current = np.where(switch, drawn, current)
+            modes[:, t] = current
+        return modes
@@ -1,5 +1,5 @@
 import math
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, deque
 
 class ValiantEstimator:
     def __init__(self, confidence_threshold=0.95, delta=0.05, c=.5):
@@ -15,20 +15,41 @@ class ValiantEstimator:
             'probabilities': {}
         }
         self.unseen_class_estimate = 0
+        self.mode_counts = Counter()
+        self.fingerprint = defaultdict(int)
+        self.num_samples = 0
+        self.bound = 0.0
+        self._requirements = {}
         
     def add_observation(self, mode_idx):
         self.observations.append(mode_idx)
+        self._count(mode_idx, 1)
         self.update_estimate()
         
+    def _count(self, mode_idx, delta):
+        count = self.mode_counts[mode_idx]
+        if count > 0:
+            self.fingerprint[count] -= 1
+            if self.fingerprint[count] == 0:
+                del self.fingerprint[count]
+                
+        count += delta
+        if count > 0:
+            self.mode_counts[mode_idx] = count
+            self.fingerprint[count] += 1
+        else:
+            del self.mode_counts[mode_idx]
+        self.num_samples += delta
+        
     def update_estimate(self):
-        if not self.observations:
+        self._requirements.clear()
+        if not self.mode_counts:
+            self.bound = 0.0
             return
             
-        n = len(self.observations)
-        mode_counts = Counter(self.observations)
-        fingerprint = defaultdict(int)
-        for count in mode_counts.values():
-            fingerprint[count] += 1
+        n = self.num_samples
+        mode_counts = self.mode_counts
+        fingerprint = self.fingerprint
         observed_unique_modes = len(mode_counts)
         
         kappa = 2 * self.delta / n
@@ -45,6 +66,7 @@ class ValiantEstimator:
             self.unseen_class_estimate = 0
             
         confidence = 1.0 - math.exp(-self.c * n / (observed_unique_modes + self.unseen_class_estimate + 1))
+        self.bound = confidence
         
         prob_estimates = {}
         for mode, count in mode_counts.items():
@@ -70,7 +92,7 @@ class ValiantEstimator:
         }
     
     def calculate_ucb(self, mode_probs):
-        n = len(self.observations)
+        n = self.num_samples
         ucb_probs = {}
         
         if n == 0:
@@ -83,20 +105,19 @@ class ValiantEstimator:
         return ucb_probs
     
     def support_estimate_bound(self):
-        n = len(self.observations)
-        if n == 0:
-            return 0.0
-            
-        observed_modes = len(set(self.observations))
-        
-        bound = 1.0 - math.exp(-self.c * n / (observed_modes + self.unseen_class_estimate + 1))
-        
-        return bound
+        return self.bound
     
     def sample_requirement(self, target_bound):
+        required = self._requirements.get(target_bound)
+        if required is None:
+            required = self._sample_requirement(target_bound)
+            self._requirements[target_bound] = required
+        return required
+    
+    def _sample_requirement(self, target_bound):
         current_bound = self.support_estimate_bound()
-        n = len(self.observations)
-        observed_modes = len(set(self.observations))
+        n = self.num_samples
+        observed_modes = len(self.mode_counts)
         
         if current_bound >= target_bound:
             return 0
@@ -120,4 +141,41 @@ class ValiantEstimator:
     def get_mode_probabilities(self):
         if not self.estimated_modes:
             return {}
-        return self.estimated_modes['probabilities']
\ No newline at end of file
+        return self.estimated_modes['probabilities']
+
+
+class WindowedValiantEstimator(ValiantEstimator):
+    def __init__(self, confidence_threshold=0.95, delta=0.05, c=.5, window=100):
+        super().__init__(confidence_threshold, delta, c)
+        self.window = window
+        self.observations = deque(maxlen=window)
+        
+    def add_observation(self, mode_idx):
+        if len(self.observations) == self.window:
+            self._count(self.observations[0], -1)
+        self.observations.append(mode_idx)
+        self._count(mode_idx, 1)
+        self.update_estimate()
+
+
+class DecayedValiantEstimator(ValiantEstimator):
+    def __init__(self, confidence_threshold=0.95, delta=0.05, c=.5, decay=0.99):
+        super().__init__(confidence_threshold, delta, c)
+        self.decay = decay
+        self.weights = {}
+        self.observations = deque(maxlen=max(1, round(1 / (1 - decay))))
+        
+    def add_observation(self, mode_idx):
+        self.observations.append(mode_idx)
+        for mode in list(self.weights):
+            self.weights[mode] *= self.decay
+            if self.weights[mode] < 0.5:
+                del self.weights[mode]
+        self.weights[mode_idx] = self.weights.get(mode_idx, 0.0) + 1.0
+        
+        self.mode_counts = Counter({mode: max(1, round(w)) for mode, w in self.weights.items()})
+        self.fingerprint = defaultdict(int)
+        for count in self.mode_counts.values():
+            self.fingerprint[count] += 1
+        self.num_samples = sum(self.mode_counts.values())
+        self.update_estimate()
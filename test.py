@@ -1,39 +1,22 @@
+import argparse
 import pygame
 import sys
 import traceback
-import time
-import numpy as np
 import matplotlib.pyplot as plt
 from constants import WIDTH, HEIGHT, WHITE
-from obstacles import create_obstacles
-from agents.target_agent import TargetAgent
-from agents.ego_agent import CasADiEgoAgent
-from utils.scenario_generator import create_random_motion_set
-from constants import GREEN
+from utils.simulation_clock import SimulationClock
+from utils.sweep import setup_simulation, run_record, run_sweep, summarize, print_summary
+from utils.result_store import ResultStore
+from utils.adaptive_sweep import AdaptiveSweep
 
-def setup_simulation(confidence_threshold):
-
-    obstacles = create_obstacles()
-    
-    target = TargetAgent(WIDTH // 2, HEIGHT // 2)
-    create_random_motion_set(target, GREEN, num_modes=10) 
-    
-    start_pos = (100, 100)
-    goal_pos = (WIDTH - 100, HEIGHT - 100)
-    
-    ego = CasADiEgoAgent(start_pos, goal_pos, target, obstacles, target_bound=confidence_threshold)
-    
-    return target, ego, obstacles
-
-def run_test(confidence_thresholds, runs_per_threshold=20, max_time_per_run=60):
+def run_test(confidence_thresholds, runs_per_threshold=20, max_time_per_run=60, realtime=True, base_seed=0, store=None):
     pygame.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     clock = pygame.time.Clock()
     font = pygame.font.SysFont(None, 30)
     
-    results = {}
-    success_rates = {}
-    collision_rates = {}
+    records = store.load(confidence_thresholds, max_time_per_run) if store is not None else []
+    completed = {(record['threshold'], record['seed']) for record in records}
     
 
     total_runs = len(confidence_thresholds) * runs_per_threshold
@@ -42,19 +25,20 @@ def run_test(confidence_thresholds, runs_per_threshold=20, max_time_per_run=60):
     for threshold in confidence_thresholds:
         pygame.display.set_caption(f"Confidence Interval Test: {threshold}")
         print(f"\nTesting confidence threshold: {threshold}")
-        success_runtimes = []
-        all_runtimes = []
-        collision_runtimes = []
         timeout_count = 0
         successes = 0
         collisions = 0
         
         for run in range(runs_per_threshold):
             current_run += 1
+            if (threshold, base_seed + run) in completed:
+                print(f"  Run {run+1}/{runs_per_threshold} already in {store.path}, skipping")
+                continue
             print(f"  Run {run+1}/{runs_per_threshold} (Overall progress: {current_run}/{total_runs})")
-            target, ego, obstacles = setup_simulation(threshold)
+            # Same seeds as the headless sweep, so a run can be watched after the fact
+            target, ego, obstacles = setup_simulation(threshold, base_seed + run)
             
-            start_time = time.time()
+            sim_clock = SimulationClock()
             running = True
             dt = 0.016
             elapsed = 0
@@ -67,8 +51,9 @@ def run_test(confidence_thresholds, runs_per_threshold=20, max_time_per_run=60):
                         sys.exit()
                 
 
-                target.update(dt, obstacles, should_stop=ego.at_goal)
-                ego.update(dt)
+                sim_clock.advance(dt)
+                target.update(dt, obstacles, should_stop=ego.at_goal, clock=sim_clock)
+                ego.update(dt, sim_clock)
                 
 
                 screen.fill(WHITE)
@@ -101,17 +86,18 @@ def run_test(confidence_thresholds, runs_per_threshold=20, max_time_per_run=60):
                     result = "collision"
                     running = False
                 
-                elapsed = time.time() - start_time
-                clock.tick(60)
+                elapsed = sim_clock.time
+                if realtime:
+                    clock.tick(60)
             
-            all_runtimes.append(elapsed)
+            records.append(run_record(threshold, base_seed + run, result, elapsed, max_time_per_run, ego))
+            if store is not None:
+                store.append(records[-1])
             
             if result == "success":
-                success_runtimes.append(elapsed)
                 successes += 1
                 print(f"    Success in {elapsed:.2f} seconds")
             elif result == "collision":
-                collision_runtimes.append(elapsed)
                 collisions += 1
                 print(f"    Collision after {elapsed:.2f} seconds")
             else:
@@ -119,46 +105,36 @@ def run_test(confidence_thresholds, runs_per_threshold=20, max_time_per_run=60):
                 print(f"    Timed out after {max_time_per_run} seconds")
             
 
-            pygame.time.delay(500)
-        
-
-        success_rates[threshold] = successes / runs_per_threshold
-        collision_rates[threshold] = collisions / runs_per_threshold
-        timeout_rate = timeout_count / runs_per_threshold
+            if realtime:
+                pygame.time.delay(500)
         
 
-        if success_runtimes:
-            success_avg = np.mean(success_runtimes)
-            results[threshold] = {
-                'success_avg': success_avg,
-                'all_avg': np.mean(all_runtimes),
-                'collision_avg': np.mean(collision_runtimes) if collision_runtimes else None,
-                'success_rate': success_rates[threshold],
-                'collision_rate': collision_rates[threshold],
-                'timeout_rate': timeout_rate
-            }
-            print(f"  Average runtime (success only): {success_avg:.2f} seconds")
-            print(f"  Average runtime (all runs): {np.mean(all_runtimes):.2f} seconds")
-            print(f"  Success rate: {success_rates[threshold]:.2f}")
-            print(f"  Collision rate: {collision_rates[threshold]:.2f}")
-            print(f"  Timeout rate: {timeout_rate:.2f}")
-        else:
-            results[threshold] = {
-                'success_avg': float('inf'),
-                'all_avg': np.mean(all_runtimes),
-                'collision_avg': np.mean(collision_runtimes) if collision_runtimes else None,
-                'success_rate': 0,
-                'collision_rate': collision_rates[threshold],
-                'timeout_rate': timeout_rate
-            }
-            print("  No successful runs")
-            print(f"  Average runtime (all runs): {np.mean(all_runtimes):.2f} seconds")
-            print(f"  Collision rate: {collision_rates[threshold]:.2f}")
-            print(f"  Timeout rate: {timeout_rate:.2f}")
+        results, _, _ = summarize(records, [threshold])
+        print_summary(results[threshold])
     
     pygame.quit()
+    return summarize(records, confidence_thresholds)
+
+def report_progress(record, done, total):
+    print(f"  [{done}/{total}] threshold {record['threshold']} seed {record['seed']}: "
+          f"{record['result']} after {record['runtime']:.2f} seconds")
+
+def run_headless(confidence_thresholds, runs_per_threshold=20, max_time_per_run=60, workers=None, base_seed=0, store=None):
+    records = run_sweep(confidence_thresholds, runs_per_threshold, max_time_per_run,
+                        workers=workers, base_seed=base_seed, progress=report_progress, store=store)
+    results, success_rates, collision_rates = summarize(records, confidence_thresholds)
+    for threshold in confidence_thresholds:
+        print(f"\nConfidence threshold: {threshold}")
+        print_summary(results[threshold])
     return results, success_rates, collision_rates
 
+def run_adaptive(confidence_thresholds, runs_per_threshold=20, max_time_per_run=60, workers=None, base_seed=0, store=None):
+    sweep = AdaptiveSweep(confidence_thresholds, runs_per_threshold, max_time_per_run, base_seed=base_seed, store=store)
+    records = sweep.run(workers, progress=report_progress)
+    print()
+    sweep.print_report()
+    return summarize(records, confidence_thresholds)
+
 def plot_results(results, success_rates, collision_rates):
 
     thresholds = list(results.keys())
@@ -306,24 +282,81 @@ def plot_results(results, success_rates, collision_rates):
     plt.show()
 
 def main():
-    confidence_thresholds = [0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.98]
+    parser = argparse.ArgumentParser(description="Sweep the confidence threshold and compare outcomes")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=None,
+                        help="default: 0.5-0.98, or every threshold in the store with --report")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--max-time", type=float, default=None, help="seconds per run (default: 30)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--headless", action="store_true", help="run without a display across a process pool")
+    parser.add_argument("--workers", type=int, default=None, help="processes for --headless (default: all cores)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="headless sweep that stops sampling thresholds once they are settled or ruled out")
+    parser.add_argument("--results", default="confidence_results.jsonl",
+                        help="append-only log of finished runs; an interrupted sweep resumes from it")
+    parser.add_argument("--fresh", action="store_true", help="discard the results log before running")
+    parser.add_argument("--report", action="store_true", help="summarize and plot the results log without running")
+    args = parser.parse_args()
+    if args.adaptive and args.runs < 2:
+        parser.error("--adaptive needs --runs of at least 2; it stops sampling a threshold early out of that budget")
+
+    store = ResultStore(args.results)
+    if args.fresh:
+        store.clear()
+    confidence_thresholds = args.thresholds
+    if confidence_thresholds is None:
+        confidence_thresholds = store.thresholds() if args.report else [0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.98]
+    max_time_per_run = args.max_time if args.max_time is not None or args.report else 30
+    if args.headless or args.adaptive or args.report:
+        plt.switch_backend('Agg')
     try:
-        results, success_rates, collision_rates = run_test(
-            confidence_thresholds,
-            runs_per_threshold=1,
-            max_time_per_run=30
-        )
+        if args.report:
+            records = store.load(confidence_thresholds, max_time_per_run)
+            print(f"Read {len(records)} runs from {args.results}")
+            if not records:
+                return
+            results, success_rates, collision_rates = summarize(records, confidence_thresholds)
+        elif args.adaptive:
+            results, success_rates, collision_rates = run_adaptive(
+                confidence_thresholds,
+                runs_per_threshold=args.runs,
+                max_time_per_run=max_time_per_run,
+                workers=args.workers,
+                base_seed=args.seed,
+                store=store
+            )
+        elif args.headless:
+            results, success_rates, collision_rates = run_headless(
+                confidence_thresholds,
+                runs_per_threshold=args.runs,
+                max_time_per_run=max_time_per_run,
+                workers=args.workers,
+                base_seed=args.seed,
+                store=store
+            )
+        else:
+            results, success_rates, collision_rates = run_test(
+                confidence_thresholds,
+                runs_per_threshold=args.runs,
+                max_time_per_run=max_time_per_run,
+                base_seed=args.seed,
+                store=store
+            )
 
 
         print("\nFinal Results:")
-        print("-" * 90)
-        print("Confidence | Success Runtime | All Runtime | Success Rate | Collision Rate | Timeout Rate")
-        print("-" * 90)
+        print("-" * 120)
+        print("Confidence | Success Runtime | All Runtime | Success Rate | Collision Rate | Timeout Rate | Solves | Plan p95")
+        print("-" * 120)
         for t in confidence_thresholds:
             sr = results[t]['success_avg']
             ar = results[t]['all_avg']
             sr_str = "N/A" if sr == float('inf') else f"{sr:.2f}s"
-            print(f"{t:^10} | {sr_str:^15} | {ar:.2f}s | {results[t]['success_rate']:^12.2f} | {results[t]['collision_rate']:^14.2f} | {results[t]['timeout_rate']:^12.2f}")
+            solves = results[t]['solves_avg']
+            solves_str = "N/A" if solves is None else f"{solves:.0f}"
+            latency = results[t]['latency_p95_ms']
+            latency_str = "N/A" if latency is None else f"{latency:.1f}ms"
+            print(f"{t:^10} | {sr_str:^15} | {ar:.2f}s | {results[t]['success_rate']:^12.2f} | {results[t]['collision_rate']:^14.2f} | {results[t]['timeout_rate']:^12.2f} | {solves_str:^6} | {latency_str:^8}")
 
 
         efficiencies = {t: results[t]['success_rate'] / results[t]['all_avg'] for t in confidence_thresholds}
@@ -337,18 +370,24 @@ def main():
 
 
         with open('confidence_test_results.csv', 'w') as f:
-            f.write("Confidence,Success Runtime,All Runtime,Collision Runtime,Success Rate,Collision Rate,Timeout Rate\n")
+            f.write("Confidence,Success Runtime,All Runtime,Collision Runtime,Success Rate,Collision Rate,Timeout Rate,"
+                    "Mean Solves,Mean Plan Latency ms,Plan Latency p95 ms\n")
             for t in confidence_thresholds:
                 cr = results[t]['collision_avg']
                 cr_str = "N/A" if cr is None else f"{cr:.2f}"
                 sr = results[t]['success_avg']
                 sr_str = "N/A" if sr == float('inf') else f"{sr:.2f}"
+                planner = ["N/A" if results[t][k] is None else f"{results[t][k]:.2f}"
+                           for k in ('solves_avg', 'latency_mean_ms', 'latency_p95_ms')]
                 f.write(f"{t},{sr_str},{results[t]['all_avg']:.2f},{cr_str},"
-                        f"{results[t]['success_rate']:.2f},{results[t]['collision_rate']:.2f},{results[t]['timeout_rate']:.2f}\n")
+                        f"{results[t]['success_rate']:.2f},{results[t]['collision_rate']:.2f},{results[t]['timeout_rate']:.2f},"
+                        f"{','.join(planner)}\n")
 
         print("\nResults saved to confidence_test_results.csv")
         print("Plots saved to confidence_results.png")
 
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; finished runs are kept in {args.results} and rerunning resumes from them")
     except Exception:
         traceback.print_exc()
     finally:
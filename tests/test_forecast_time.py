@@ -0,0 +1,64 @@
+import numpy as np
+from constants import GREEN
+from agents.dynamic_mode import DynamicMode, sine_wave_motion, circular_motion
+from agents.target_agent import TargetAgent
+from planning.mpc import CasADiMPC
+from planning.scenario_rollout import ScenarioRollout
+from planning.valiant_estimator import ValiantEstimator
+
+
+def time_dependent_modes():
+    return [DynamicMode(GREEN, sine_wave_motion), DynamicMode(GREEN, circular_motion)]
+
+
+def test_converged_forecast_depends_on_start_time():
+    state = (400.0, 300.0, 0.0, 0.0)
+    probs = {0: 0.5, 1: 0.5}
+    forecasts = []
+    for time_val in (0.0, 7.3):
+        rollout = ScenarioRollout(time_dependent_modes(), [], horizon=10, dt=0.1, rng=np.random.default_rng(0))
+        forecasts.append(rollout.generate_converged(state, probs, 20, 5, 5.0, time_val=time_val))
+    assert not np.allclose(forecasts[0], forecasts[1])
+
+
+def test_planner_forecast_uses_snapshot_timestamp():
+    target = TargetAgent(400, 300)
+    for mode in time_dependent_modes():
+        target.add_mode(mode)
+    mpc = CasADiMPC(target, ValiantEstimator(0.9), [], forecast_cache_bytes=0, rng=np.random.default_rng(0))
+
+    seen = []
+    kernel = target.modes[0].kernel
+    target.modes[0].kernel = lambda x, y, vx, vy, dt, time_val: seen.append(time_val) or kernel(x, y, vx, vy, dt, time_val)
+    mpc.generate_target_scenarios((400.0, 300.0, 0.0, 0.0), {0: 1.0}, confidence=0.9, timestamp=7.3)
+    assert seen and min(seen) >= 7.3
+
+
+def test_cached_forecast_follows_simulation_time():
+    target = TargetAgent(400, 300)
+    target.add_mode(DynamicMode(GREEN, circular_motion))
+    state, probs = (400.0, 300.0, 0.0, 0.0), {0: 1.0}
+
+    mpc = CasADiMPC(target, ValiantEstimator(0.9), [], rng=np.random.default_rng(0))
+    early = mpc.generate_target_scenarios(state, probs, confidence=0.9, timestamp=1.0)
+    later = mpc.generate_target_scenarios(state, probs, confidence=0.9, timestamp=1.9)
+    assert mpc.forecast_cache.hits == 0
+    assert not np.allclose(early, later)
+
+    fresh = CasADiMPC(target, ValiantEstimator(0.9), [], forecast_cache_bytes=0, rng=np.random.default_rng(0))
+    assert np.allclose(later, fresh.generate_target_scenarios(state, probs, confidence=0.9, timestamp=1.9))
+
+
+def test_cached_forecast_matches_scenario_budget():
+    target = TargetAgent(400, 300)
+    for mode in time_dependent_modes():
+        target.add_mode(mode)
+    state, probs = (400.0, 300.0, 0.0, 0.0), {0: 0.9, 1: 0.1}
+
+    mpc = CasADiMPC(target, ValiantEstimator(0.9), [], rng=np.random.default_rng(0))
+    assert mpc.scenario_budget(probs, 0.99) != mpc.scenario_budget(probs, 0.1)
+    mpc.generate_target_scenarios(state, probs, confidence=0.99, timestamp=1.0)
+    mpc.generate_target_scenarios(state, probs, confidence=0.1, timestamp=1.0)
+    assert mpc.forecast_cache.hits == 0
+    mpc.generate_target_scenarios(state, probs, confidence=0.1, timestamp=1.0)
+    assert mpc.forecast_cache.hits == 1
@@ -0,0 +1,108 @@
+from collections import Counter, defaultdict
+import numpy as np
+import pytest
+from planning.estimator_bank import ValiantEstimatorBank
+from planning.valiant_estimator import ValiantEstimator, WindowedValiantEstimator
+
+NUM_MODES = 6
+
+
+def observation_stream(seed, steps=120):
+    rng = np.random.default_rng(seed)
+    # Skewed draws, so some modes stay rare and the Good-Turing branch is exercised
+    return [int(mode) for mode in rng.choice(NUM_MODES, size=steps, p=[0.4, 0.25, 0.15, 0.1, 0.07, 0.03])]
+
+
+def rebuilt(observations, estimator_class=ValiantEstimator):
+    estimator = estimator_class(0.9)
+    estimator.mode_counts = Counter(observations)
+    estimator.fingerprint = defaultdict(int)
+    for count in estimator.mode_counts.values():
+        estimator.fingerprint[count] += 1
+    estimator.num_samples = len(observations)
+    estimator.update_estimate()
+    return estimator
+
+
+def assert_same_estimate(estimator, reference):
+    estimate, expected = dict(estimator.estimated_modes), dict(reference.estimated_modes)
+    # Modes can be counted in a different order, which only moves the normalization's last bit
+    assert estimate.pop('probabilities') == pytest.approx(expected.pop('probabilities'))
+    assert estimate == expected
+    assert estimator.support_estimate_bound() == reference.support_estimate_bound()
+    assert estimator.sample_requirement(0.99) == reference.sample_requirement(0.99)
+
+
+def test_incremental_estimate_matches_rebuild():
+    for seed in range(5):
+        estimator = ValiantEstimator(0.9)
+        observations = observation_stream(seed)
+        for step, mode in enumerate(observations, 1):
+            estimator.add_observation(mode)
+            assert_same_estimate(estimator, rebuilt(observations[:step]))
+
+
+def test_windowed_estimate_matches_rebuild():
+    estimator = WindowedValiantEstimator(0.9, window=30)
+    observations = observation_stream(0)
+    for step, mode in enumerate(observations, 1):
+        estimator.add_observation(mode)
+        assert_same_estimate(estimator, rebuilt(observations[max(0, step - 30):step]))
+
+
+def scalar_estimates(estimators):
+    probs = np.zeros((len(estimators), NUM_MODES))
+    ucb = np.zeros((len(estimators), NUM_MODES))
+    for i, estimator in enumerate(estimators):
+        mode_probs = estimator.get_mode_probabilities()
+        for mode, prob in mode_probs.items():
+            probs[i, mode] = prob
+        for mode, prob in estimator.calculate_ucb(mode_probs).items():
+            ucb[i, mode] = prob
+    return {
+        'probabilities': probs,
+        'ucb': ucb,
+        'bound': np.array([estimator.support_estimate_bound() for estimator in estimators]),
+        'requirement': np.array([estimator.sample_requirement(0.99) for estimator in estimators]),
+        'sufficient': np.array([estimator.sufficient_confidence() for estimator in estimators])
+    }
+
+
+def assert_bank_matches(bank, estimators):
+    expected = scalar_estimates(estimators)
+    assert np.allclose(bank.get_mode_probabilities(), expected['probabilities'])
+    assert np.allclose(bank.calculate_ucb(), expected['ucb'])
+    assert np.allclose(bank.support_estimate_bound(), expected['bound'])
+    assert np.array_equal(bank.sample_requirement(0.99), expected['requirement'])
+    assert np.array_equal(bank.sufficient_confidence(), expected['sufficient'])
+
+
+def stream_matrix(num_streams=50, steps=120):
+    observations = np.array([observation_stream(seed, steps) for seed in range(num_streams)])
+    # Streams that miss a step report -1, which both bank entry points skip
+    observations[np.random.default_rng(0).random(observations.shape) < 0.1] = -1
+    return observations
+
+
+def test_bank_observations_match_scalar_estimators():
+    observations = stream_matrix()
+    bank = ValiantEstimatorBank(len(observations), NUM_MODES, 0.9)
+    estimators = [ValiantEstimator(0.9) for _ in observations]
+    for step in range(observations.shape[1]):
+        bank.add_observations(observations[:, step])
+        for estimator, mode in zip(estimators, observations[:, step]):
+            if mode >= 0:
+                estimator.add_observation(int(mode))
+        assert_bank_matches(bank, estimators)
+
+
+def test_bank_sequences_match_scalar_estimators():
+    observations = stream_matrix()
+    bank = ValiantEstimatorBank(len(observations), NUM_MODES, 0.9)
+    estimators = [ValiantEstimator(0.9) for _ in observations]
+    for chunk in np.array_split(observations, 4, axis=1):
+        bank.add_sequences(chunk)
+        for estimator, modes in zip(estimators, chunk):
+            for mode in modes[modes >= 0]:
+                estimator.add_observation(int(mode))
+        assert_bank_matches(bank, estimators)
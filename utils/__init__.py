@@ -1,2 +1,3 @@
 from utils.visualization import draw_text, draw_legend, draw_estimation_stats, create_standard_legend
-from utils.scenario_generator import setup_motion_modes, create_random_motion_set
\ No newline at end of file
+from utils.scenario_generator import setup_motion_modes, create_random_motion_set
+from utils.random_streams import RandomStreams
\ No newline at end of file
@@ -0,0 +1,164 @@
+import math
+import os
+import numpy as np
+from utils.sweep import process_pool, run_jobs
+
+
+def wilson_interval(successes, n, z=1.96):
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z**2 / n
+    centre = (p + z**2 / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / denominator
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def mean_interval(values, low, high, z=1.96):
+    if len(values) < 2:
+        return low, high
+    half = z * np.std(values, ddof=1) / math.sqrt(len(values))
+    mean = np.mean(values)
+    return max(low, mean - half), min(high, mean + half)
+
+
+class AdaptiveSweep:
+    def __init__(self, thresholds, runs_per_threshold=20, max_time_per_run=60, min_runs=None, max_runs=None,
+                 success_width=0.25, runtime_width=None, z=1.96, base_seed=0, store=None):
+        if min_runs is None:
+            min_runs = min(8, runs_per_threshold // 2)
+        if max_runs is None:
+            max_runs = 4 * runs_per_threshold
+        # A threshold is only judged after min_runs, so with fewer per threshold the first round spends the whole budget
+        if not 1 <= min_runs < runs_per_threshold:
+            raise ValueError(f"Adaptive sweep needs 1 <= min_runs < runs_per_threshold to stop early, "
+                             f"got min_runs={min_runs} and runs_per_threshold={runs_per_threshold}")
+        if max_runs < runs_per_threshold:
+            raise ValueError(f"max_runs={max_runs} caps thresholds below the {runs_per_threshold} runs of the fixed design")
+
+        self.thresholds = list(thresholds)
+        self.fixed_runs = runs_per_threshold
+        # Same total as the fixed design; whatever a threshold does not need goes to the others
+        self.budget = len(self.thresholds) * runs_per_threshold
+        self.max_time_per_run = max_time_per_run
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.success_width = success_width
+        self.runtime_width = runtime_width if runtime_width is not None else 0.1 * max_time_per_run
+        self.z = z
+        self.base_seed = base_seed
+
+        self.store = store
+        self.records = store.load(self.thresholds, max_time_per_run) if store is not None else []
+        self.status = {threshold: 'active' for threshold in self.thresholds}
+        self.rounds = 0
+        if self.records:
+            self.update_status()
+
+    def runs(self, threshold):
+        return [record for record in self.records if record['threshold'] == threshold]
+
+    def intervals(self, threshold):
+        runs = self.runs(threshold)
+        successes = sum(record['result'] == 'success' for record in runs)
+        runtimes = [record['runtime'] for record in runs]
+        return {
+            'runs': len(runs),
+            'success_rate': successes / len(runs) if runs else 0.0,
+            'success': wilson_interval(successes, len(runs), self.z),
+            'runtime': mean_interval(runtimes, 0.0, self.max_time_per_run, self.z)
+        }
+
+    def active(self):
+        return [threshold for threshold in self.thresholds if self.status[threshold] == 'active']
+
+    def update_status(self):
+        intervals = {threshold: self.intervals(threshold) for threshold in self.thresholds}
+        best_lower = max(interval['success'][0] for interval in intervals.values())
+
+        for threshold in self.active():
+            interval = intervals[threshold]
+            success_width = interval['success'][1] - interval['success'][0]
+            runtime_width = interval['runtime'][1] - interval['runtime'][0]
+            if interval['runs'] < self.min_runs:
+                continue
+            if interval['success'][1] < best_lower:
+                self.status[threshold] = 'ruled out'
+            elif success_width <= self.success_width and runtime_width <= self.runtime_width:
+                self.status[threshold] = 'settled'
+            elif interval['runs'] >= self.max_runs:
+                self.status[threshold] = 'capped'
+
+        # A lone contender has nothing left to be compared against
+        contenders = [threshold for threshold in self.thresholds if self.status[threshold] != 'ruled out']
+        if len(contenders) == 1 and self.status[contenders[0]] == 'active':
+            self.status[contenders[0]] = 'best'
+
+    def next_jobs(self):
+        active = self.active()
+        remaining = self.budget - len(self.records)
+        if not active or remaining <= 0:
+            return []
+
+        # Successive-halving schedule: every round doubles the batch given to the thresholds still in play
+        batch = self.min_runs * 2**self.rounds
+        share = min(batch, remaining // len(active))
+        allotment = {threshold: min(share, self.max_runs - len(self.runs(threshold))) for threshold in active}
+        if share == 0:
+            # Fewer runs left than thresholds: spend them on the widest success intervals
+            bounds = {threshold: self.intervals(threshold)['success'] for threshold in active}
+            widest = sorted(active, key=lambda threshold: bounds[threshold][1] - bounds[threshold][0], reverse=True)
+            for threshold in widest[:remaining]:
+                allotment[threshold] = 1
+
+        jobs = []
+        for threshold in active:
+            # Next unused seeds, so runs resumed from the store are never repeated
+            done = {record['seed'] for record in self.runs(threshold)}
+            seed = self.base_seed
+            for _ in range(allotment[threshold]):
+                while seed in done:
+                    seed += 1
+                jobs.append((threshold, seed))
+                seed += 1
+        return jobs
+
+    def run(self, workers=None, progress=None):
+        workers = workers or os.cpu_count() or 1
+        pool = process_pool(workers) if workers > 1 else None
+        try:
+            while True:
+                jobs = self.next_jobs()
+                if not jobs:
+                    break
+                records = run_jobs(jobs, self.max_time_per_run, pool, progress, self.store)
+                if not records:
+                    # Every run of the round failed; retrying the same seeds would only fail again
+                    break
+                self.records += records
+                self.rounds += 1
+                self.update_status()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        for threshold in self.active():
+            self.status[threshold] = 'budget'
+        return self.records
+
+    def print_report(self):
+        print(f"{'Confidence':^10} | {'Runs':^5} | {'Success rate':^20} | {'Runtime':^22} | {'Status':^9}")
+        print("-" * 78)
+        for threshold in self.thresholds:
+            interval = self.intervals(threshold)
+            success = f"{interval['success_rate']:.2f} [{interval['success'][0]:.2f}, {interval['success'][1]:.2f}]"
+            runtime = f"[{interval['runtime'][0]:.2f}s, {interval['runtime'][1]:.2f}s]"
+            print(f"{threshold:^10} | {interval['runs']:^5} | {success:^20} | {runtime:^22} | {self.status[threshold]:^9}")
+
+        used = len(self.records)
+        saved = self.budget - used
+        stopped = [threshold for threshold in self.thresholds if self.status[threshold] in ('ruled out', 'settled')]
+        freed = sum(max(self.fixed_runs - len(self.runs(threshold)), 0) for threshold in stopped)
+        print(f"\nAdaptive sweep used {used} runs in {self.rounds} rounds; the fixed design needs "
+              f"{self.budget} ({self.fixed_runs} per threshold), saving {saved} ({saved / self.budget:.0%})")
+        print(f"Stopping early freed {freed} runs, of which {freed - saved} went to the closest calls")
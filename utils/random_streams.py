@@ -0,0 +1,14 @@
+import zlib
+import numpy as np
+
+
+class RandomStreams:
+    def __init__(self, seed=None):
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
+        self._streams = {}
+
+    def get(self, name):
+        # Each component's stream depends only on the seed and its name, not on who asked first
+        if name not in self._streams:
+            self._streams[name] = np.random.default_rng([self.seed, zlib.crc32(name.encode())])
+        return self._streams[name]
@@ -0,0 +1,48 @@
+import json
+import os
+
+
+class ResultStore:
+    def __init__(self, path):
+        self.path = path
+        self._drop_partial_line()
+
+    def _drop_partial_line(self):
+        # A crash mid-write leaves at most one unterminated line; cut it so appends start on a clean line
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def append(self, record):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load(self, thresholds=None, max_time_per_run=None):
+        records = []
+        if not os.path.exists(self.path):
+            return records
+
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if thresholds is not None and record['threshold'] not in thresholds:
+                    continue
+                if max_time_per_run is not None and record.get('max_time') != max_time_per_run:
+                    continue
+                records.append(record)
+        return records
+
+    def thresholds(self):
+        return sorted({record['threshold'] for record in self.load()})
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
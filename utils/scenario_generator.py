@@ -1,4 +1,4 @@
-import random
+import numpy as np
 from agents.dynamic_mode import (
     DynamicMode,
     linear_motion, 
@@ -23,16 +23,11 @@ def setup_motion_modes(target_agent, green_color):
     target_agent.add_mode(DynamicMode(green_color, zigzag_motion))
     target_agent.add_mode(DynamicMode(green_color, spiral_motion))
     target_agent.add_mode(DynamicMode(green_color, bounce_motion))
-    
-
-    pursuit_wrapper = lambda target, dt: pursuit_motion(target, dt)
-    evasion_wrapper = lambda target, dt: evasion_motion(target, dt)
-    
-    target_agent.add_mode(DynamicMode(green_color, pursuit_wrapper))
-    target_agent.add_mode(DynamicMode(green_color, evasion_wrapper))
+    target_agent.add_mode(DynamicMode(green_color, pursuit_motion))
+    target_agent.add_mode(DynamicMode(green_color, evasion_motion))
     target_agent.add_mode(DynamicMode(green_color, oscillating_motion))
 
-def create_random_motion_set(target_agent, green_color, num_modes=5):
+def create_random_motion_set(target_agent, green_color, num_modes=5, rng=None):
 
     all_modes = [
         linear_motion,
@@ -42,12 +37,13 @@ def create_random_motion_set(target_agent, green_color, num_modes=5):
         zigzag_motion,
         spiral_motion,
         bounce_motion,
-        lambda target, dt: pursuit_motion(target, dt),
-        lambda target, dt: evasion_motion(target, dt),
+        pursuit_motion,
+        evasion_motion,
         oscillating_motion
     ]
     
-    selected_modes = random.sample(all_modes, min(num_modes, len(all_modes)))
+    rng = rng if rng is not None else np.random
+    selected = rng.choice(len(all_modes), min(num_modes, len(all_modes)), replace=False)
     
-    for mode in selected_modes:
-        target_agent.add_mode(DynamicMode(green_color, mode))
\ No newline at end of file
+    for index in selected:
+        target_agent.add_mode(DynamicMode(green_color, all_modes[index]))
\ No newline at end of file
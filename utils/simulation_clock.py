@@ -0,0 +1,11 @@
+class SimulationClock:
+    def __init__(self, start=0.0):
+        self.start = start
+        self.time = start
+
+    def advance(self, dt):
+        self.time += dt
+        return self.time
+
+    def reset(self):
+        self.time = self.start
@@ -0,0 +1,226 @@
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from constants import WIDTH, HEIGHT, GREEN
+from obstacles import create_obstacles
+from agents.target_agent import TargetAgent
+from agents.ego_agent import CasADiEgoAgent
+from agents.target_replay import TargetRecorder, ReplayTargetAgent
+from utils.scenario_generator import create_random_motion_set
+from utils.simulation_clock import SimulationClock
+from utils.random_streams import RandomStreams
+
+OUTCOMES = ('success', 'collision', 'timeout')
+
+
+def setup_simulation(confidence_threshold, seed=None, replay=None, solve_time_budget=None, **ego_options):
+    # Separate streams keep the target workload fixed whatever the planner draws
+    streams = RandomStreams(seed)
+    obstacles = create_obstacles()
+
+    if replay is not None:
+        target = ReplayTargetAgent(replay)
+    else:
+        target = TargetAgent(WIDTH // 2, HEIGHT // 2, rng=streams.get('target'))
+        create_random_motion_set(target, GREEN, num_modes=10, rng=streams.get('motion_set'))
+
+    start_pos = (100, 100)
+    goal_pos = (WIDTH - 100, HEIGHT - 100)
+
+    # No wall-clock solve budget by default, so a seed replays the same run however loaded the machine is
+    ego = CasADiEgoAgent(start_pos, goal_pos, target, obstacles, target_bound=confidence_threshold,
+                         solve_time_budget=solve_time_budget, rng=streams.get('planner'), **ego_options)
+
+    return target, ego, obstacles
+
+
+def record_workload(seed, path, duration=60, dt=0.016):
+    # Target alone, so the recording covers the whole run however early a planner finishes
+    streams = RandomStreams(seed)
+    obstacles = create_obstacles()
+    target = TargetAgent(WIDTH // 2, HEIGHT // 2, rng=streams.get('target'))
+    create_random_motion_set(target, GREEN, num_modes=10, rng=streams.get('motion_set'))
+    recorder = TargetRecorder(target)
+    clock = SimulationClock()
+    while clock.time < duration:
+        clock.advance(dt)
+        target.update(dt, obstacles, clock=clock)
+        recorder.record()
+    recorder.save(path, seed)
+    return path
+
+
+def planner_stats(ego):
+    latencies = np.array(ego.mpc.plan_latencies) * 1000
+    return {
+        'solves': sum(ego.mpc.tier_counts.values()),
+        'tiers': dict(ego.mpc.tier_counts),
+        'latency_mean_ms': float(np.mean(latencies)) if len(latencies) else None,
+        'latency_p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else None,
+        'latency_max_ms': float(np.max(latencies)) if len(latencies) else None
+    }
+
+
+def run_record(threshold, seed, result, runtime, max_time_per_run, ego):
+    record = {'threshold': threshold, 'seed': seed, 'result': result, 'runtime': runtime, 'max_time': max_time_per_run}
+    record.update(planner_stats(ego))
+    return record
+
+
+def simulate_run(threshold, seed, max_time_per_run=60, dt=0.016, replay=None, record=None, ego_options=None):
+    target, ego, obstacles = setup_simulation(threshold, seed, replay, **(ego_options or {}))
+    recorder = TargetRecorder(target) if record is not None else None
+    clock = SimulationClock()
+
+    result = "timeout"
+    while clock.time < max_time_per_run:
+        clock.advance(dt)
+        target.update(dt, obstacles, should_stop=ego.at_goal, clock=clock)
+        if recorder is not None:
+            recorder.record()
+        ego.update(dt, clock)
+        if ego.at_goal:
+            result = "success"
+            break
+        if ego.collision or ego.collision_with_obstacle:
+            result = "collision"
+            break
+
+    if recorder is not None:
+        recorder.save(record, seed)
+    return run_record(threshold, seed, result, min(clock.time, max_time_per_run), max_time_per_run, ego)
+
+
+def ignore_interrupts():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def process_pool(workers=None):
+    # One solver thread per process; the pool supplies the parallelism
+    for variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ.setdefault(variable, '1')
+    context = multiprocessing.get_context('spawn')
+    # Ctrl-C is handled by the parent, which stops handing out runs
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=context,
+                               initializer=ignore_interrupts)
+
+
+def run_jobs(jobs, max_time_per_run=60, pool=None, progress=None, store=None):
+    records = []
+
+    def finished(record):
+        records.append(record)
+        if store is not None:
+            store.append(record)
+        if progress is not None:
+            progress(record, len(records), len(jobs))
+
+    def failed(job, error):
+        # One failing run must not cost the others; it is not stored, so a resumed sweep retries it
+        print(f"Run with threshold {job[0]} and seed {job[1]} failed: {error!r}")
+
+    if pool is None:
+        # CasADi swallows SIGINT inside a solve, so note it and stop between runs instead
+        interrupted = []
+        previous = signal.signal(signal.SIGINT, lambda signum, frame: interrupted.append(signum))
+        try:
+            for job in jobs:
+                try:
+                    record = simulate_run(job[0], job[1], max_time_per_run)
+                except Exception as e:
+                    failed(job, e)
+                else:
+                    finished(record)
+                if interrupted:
+                    raise KeyboardInterrupt
+        finally:
+            signal.signal(signal.SIGINT, previous)
+        return records
+
+    futures = {pool.submit(simulate_run, threshold, seed, max_time_per_run): (threshold, seed) for threshold, seed in jobs}
+    try:
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as e:
+                failed(futures[future], e)
+            else:
+                finished(record)
+    except KeyboardInterrupt:
+        for future in futures:
+            future.cancel()
+        raise
+
+    records.sort(key=lambda record: (record['threshold'], record['seed']))
+    return records
+
+
+def run_sweep(thresholds, runs_per_threshold=20, max_time_per_run=60, workers=None, base_seed=0, progress=None,
+              store=None):
+    # Every threshold sees the same seeds, so differences come from the threshold and not the draw
+    jobs = [(threshold, base_seed + run) for threshold in thresholds for run in range(runs_per_threshold)]
+    workers = workers or os.cpu_count() or 1
+
+    records = []
+    if store is not None:
+        # Resume: jobs already in the store are not run again
+        wanted = set(jobs)
+        records = [record for record in store.load(thresholds, max_time_per_run)
+                   if (record['threshold'], record['seed']) in wanted]
+        done = {(record['threshold'], record['seed']) for record in records}
+        jobs = [job for job in jobs if job not in done]
+
+    if workers == 1:
+        records += run_jobs(jobs, max_time_per_run, progress=progress, store=store)
+    else:
+        with process_pool(workers) as pool:
+            records += run_jobs(jobs, max_time_per_run, pool, progress, store)
+
+    records.sort(key=lambda record: (record['threshold'], record['seed']))
+    return records
+
+
+def mean_of(records, field):
+    values = [record[field] for record in records if record.get(field) is not None]
+    return float(np.mean(values)) if values else None
+
+
+def summarize(records, thresholds):
+    results = {}
+    success_rates = {}
+    collision_rates = {}
+
+    for threshold in thresholds:
+        runs = [record for record in records if record['threshold'] == threshold]
+        runtimes = {outcome: [r['runtime'] for r in runs if r['result'] == outcome] for outcome in OUTCOMES}
+        total = max(len(runs), 1)
+
+        success_rates[threshold] = len(runtimes['success']) / total
+        collision_rates[threshold] = len(runtimes['collision']) / total
+        results[threshold] = {
+            'success_avg': np.mean(runtimes['success']) if runtimes['success'] else float('inf'),
+            'all_avg': np.mean([r['runtime'] for r in runs]) if runs else float('nan'),
+            'collision_avg': np.mean(runtimes['collision']) if runtimes['collision'] else None,
+            'success_rate': success_rates[threshold],
+            'collision_rate': collision_rates[threshold],
+            'timeout_rate': len(runtimes['timeout']) / total,
+            'solves_avg': mean_of(runs, 'solves'),
+            'latency_mean_ms': mean_of(runs, 'latency_mean_ms'),
+            'latency_p95_ms': mean_of(runs, 'latency_p95_ms')
+        }
+
+    return results, success_rates, collision_rates
+
+
+def print_summary(threshold_results):
+    if threshold_results['success_avg'] != float('inf'):
+        print(f"  Average runtime (success only): {threshold_results['success_avg']:.2f} seconds")
+    else:
+        print("  No successful runs")
+    print(f"  Average runtime (all runs): {threshold_results['all_avg']:.2f} seconds")
+    if threshold_results['success_avg'] != float('inf'):
+        print(f"  Success rate: {threshold_results['success_rate']:.2f}")
+    print(f"  Collision rate: {threshold_results['collision_rate']:.2f}")
+    print(f"  Timeout rate: {threshold_results['timeout_rate']:.2f}")
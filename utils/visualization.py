@@ -31,12 +31,26 @@ def draw_estimation_stats(surface, font, ego_agent, position=(10, 10)):
     if ego_agent.estimator.estimated_modes:
         texts = [
             (f"Confidence: {ego_agent.estimator.support_estimate_bound():.2f}", BLACK),
-            (f"Samples: {len(ego_agent.estimator.observations)}", BLACK),
+            (f"Samples: {ego_agent.estimator.num_samples}", BLACK),
             (f"Est. Modes: {ego_agent.estimator.estimated_modes['estimated_total']}", BLACK),
             (f"Needed: {ego_agent.estimator.sample_requirement(ego_agent.target_bound)} more samples", BLACK),
             (f"Sufficient: {'Yes' if ego_agent.sufficient_samples else 'No'}", BLACK)
         ]
         
+        if ego_agent.mpc.num_scenarios_used:
+            texts.append((f"Scenarios: {ego_agent.mpc.num_scenarios_used} ({ego_agent.mpc.scenarios_reused} reused)", BLACK))
+        
+        if ego_agent.mpc.plan_tier is not None:
+            texts.append((f"Plan tier: {ego_agent.mpc.plan_tier}", BLACK))
+        
+        if ego_agent.mpc.forecast_cache is not None:
+            cache_stats = ego_agent.mpc.forecast_cache.stats()
+            texts.append((f"Forecast cache: {cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']} hits", BLACK))
+        
+        if ego_agent.async_planner is not None:
+            planner_stats = ego_agent.async_planner.stats
+            texts.append((f"Late plans: {planner_stats['late']}/{planner_stats['completed']}", BLACK))
+        
 
         if ego_agent.using_conservative_trajectory:
             texts.append(("Conservative: Low Confidence", (255, 165, 0))) 